@@ -20,14 +20,15 @@ if __name__ == "__main__":
     sfiles = case_insensitive_glob(os.path.join(ROOT_DIR, "data/sonderingen"), ".gef")
     bfiles = case_insensitive_glob(os.path.join(ROOT_DIR, "data/boringen"), ".gef")
 
+    # we only need the coordinates to find the pairs so skip the data blocks
     for sfile in tqdm(sfiles):
         cpt = CPT()
-        cpt.read(sfile)
+        cpt.read(sfile, header_only=True)
         sonderingen.append(cpt)
 
     for bfile in tqdm(bfiles):
         borehole = Borehole()
-        borehole.read(bfile)
+        borehole.read(bfile, header_only=True)
 
         for cpt in sonderingen:
             dx = cpt.x - borehole.x
@@ -44,10 +45,8 @@ if __name__ == "__main__":
     finaldata = None
     for line in lines:
         args = line.split(',')
-        cpt = CPT()
-        cpt.read(args[1])
-        borehole = Borehole()
-        borehole.read(args[4])
+        cpt = CPT.from_file(args[1])
+        borehole = Borehole.from_file(args[4])
         try:
             borehole.convert()
             data = cpt.as_dataframe()
@@ -68,7 +67,7 @@ if __name__ == "__main__":
             ax = fig.add_subplot()
 
 
-            data = cpt.as_dataframe()
+            data = cpt.as_dataframe().copy() # we change the Rf column so do not work on the cpt data
             data.plot(x='qc',y='z', ax=ax, label='qc [MPa]')
             data['Rf'] = 50. - data['Rf']
             data.plot(x='Rf',y='z', ax=ax, label='Rf [%]')
@@ -22,12 +22,12 @@ cpts = []
 
 print("Reading existing boreholes...")
 for fborehole in tqdm(boreholegefs):
-    borehole = Borehole.from_file(fborehole)
+    borehole = Borehole.from_file(fborehole, header_only=True)
     boreholes.append(borehole)
 
 print("Reading existing cpts...")
 for fcpt in tqdm(cptgefs):
-    cpt = CPT.from_file(fcpt)
+    cpt = CPT.from_file(fcpt, header_only=True)
     cpts.append(cpt)
 
 # save some stuff for easy checks, might need more characteristics if double entries are found
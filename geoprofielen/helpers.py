@@ -1,6 +1,8 @@
-from typing import List
+from typing import List, Tuple
 from pathlib import Path
 import glob
+import numpy as np
+import shapely.wkb
 
 def case_insensitive_glob(filepath: str, fileextension: str) -> List[Path]:
     """Find files in given path with given file extension (case insensitive)
@@ -18,3 +20,50 @@ def case_insensitive_glob(filepath: str, fileextension: str) -> List[Path]:
         if str(filename.suffix).lower() == fileextension.lower():
             result.append(filename.absolute())
     return result
+
+
+def read_gef_header(filename: str, count_rows: bool = False) -> Tuple[List[str], int, int]:
+    """Read the header of a GEF file, stops at #EOH so the data block will not be parsed
+
+    Arguments:
+        filename (str): the name of the GEF file
+        count_rows (bool): also count the (non empty) rows of the data block, default False
+
+    Returns:
+        Tuple[List[str], int, int]: the header lines, the byte offset of the data block and the number of datarows (-1 if not counted)
+    """
+    lines, offset, num_rows = [], 0, -1
+    with open(filename, "rb") as f:
+        for line in f:
+            offset += len(line)
+            line = line.decode("utf-8", errors="ignore")
+            if line.find("#EOH") >= 0:
+                break
+            lines.append(line)
+
+        if count_rows:
+            num_rows = sum(1 for line in f if len(line.strip()) > 0)
+
+    return lines, offset, num_rows
+
+
+def wkb_to_linestrings(wkb: bytes) -> List[np.array]:
+    """Decode a (Multi)LineString in WKB (or PostGIS EWKB) format to coordinate arrays, 
+    the Z and M values are ignored
+
+    Arguments:
+        wkb (bytes): the WKB data (None is handled as an empty geometry)
+
+    Returns:
+        List[np.array]: one (n,2) array with the x and y coordinates per linestring
+    """
+    if wkb is None:
+        return []
+    geometry = shapely.wkb.loads(bytes(wkb))
+    if geometry.geom_type == "LineString":
+        linestrings = [geometry]
+    elif geometry.geom_type == "MultiLineString":
+        linestrings = list(geometry.geoms)
+    else:
+        raise ValueError(f"Unsupported WKB geometry type {geometry.geom_type}, only LineString and MultiLineString are supported")
+    return [np.asarray(linestring.coords, dtype=float)[:,:2] for linestring in linestrings if not linestring.is_empty]
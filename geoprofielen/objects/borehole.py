@@ -10,18 +10,47 @@ __status__ = "Development"
 from pydantic import BaseModel
 from typing import List
 from pathlib import Path
+from functools import lru_cache
+import re
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
-import matplotlib.patches as patches
 
 from .soillayer import SoilLayer
-from ..settings import HDSR_SOIL_COLORS, BOREHOLE_CODES
+from .gefcache import GEFCache
+from .plotting import soillayer_collection
+from ..helpers import read_gef_header
+from ..settings import BOREHOLE_CODES
 
 GEF_COLUMN_TOP = 1
 GEF_COLUMN_BOTTOM = 2
 
+# BOREHOLE_CODES compiled to one regular expression, the lookahead makes sure that
+# at every position in the string the shortcode with the highest precedence is found
+BOREHOLE_SHORTCODES = {} # shortcode -> (precedence, HDSR soilcode)
+for soilcode, shortcodes in BOREHOLE_CODES.items():
+    for shortcode in shortcodes:
+        if not shortcode in BOREHOLE_SHORTCODES:
+            BOREHOLE_SHORTCODES[shortcode] = (len(BOREHOLE_SHORTCODES), soilcode)
+BOREHOLE_CODES_REGEX = re.compile("(?=(" + "|".join([re.escape(s) for s in BOREHOLE_SHORTCODES.keys()]) + "))")
+
+@lru_cache(maxsize=None)
+def _translate_soilcode(soilcode: str) -> str:
+    """Translate a soilcode from a GEF file to a HDSR soilcode, if multiple shortcodes
+    are found the first one in BOREHOLE_CODES wins
+
+    Args:
+        soilcode (str): the soilcode from the GEF file
+
+    Returns:
+        str: the HDSR soilcode or None if there is no translation
+    """
+    matches = [BOREHOLE_SHORTCODES[m.group(1)] for m in BOREHOLE_CODES_REGEX.finditer(soilcode)]
+    if len(matches) == 0:
+        return None
+    return min(matches)[1]
+
 class Borehole(BaseModel):
     x: float = 0.0
     y: float = 0.0
@@ -35,10 +64,23 @@ class Borehole(BaseModel):
 
     filename: str = ""
 
+    data_offset: int = -1 # byte offset of the data block (header only mode)
+    num_datarows: int = -1 # number of rows in the data block (header only mode with count_rows)
+
     @classmethod
-    def from_file(self, filename: str) -> 'Borehole':
+    def from_file(self, filename: str, header_only: bool = False, count_rows: bool = False) -> 'Borehole':
+        # full reads are cached (if GEF_CACHE_PATH is set), header only reads are cheap enough as they are
+        gefcache = GEFCache()
+        if not header_only:
+            borehole = gefcache.load(filename, tag="Borehole")
+            if borehole is not None:
+                return borehole
+
         borehole = Borehole()
-        borehole.read(filename)
+        borehole.read(filename, header_only=header_only, count_rows=count_rows)
+
+        if not header_only:
+            gefcache.save(filename, borehole, tag="Borehole")
         return borehole
 
     @property
@@ -104,11 +146,25 @@ class Borehole(BaseModel):
             else:
                 self._parse_data_line(line, metadata)
 
-    def read(self, filename: str) -> None:
+    def read(self, filename: str, header_only: bool = False, count_rows: bool = False) -> None:
+        """
+        Read a file
+
+        Args:
+            filename (str): the name of the file to be read
+            header_only (bool): only read the header metadata, default False
+            count_rows (bool): count the datarows in header only mode, default False
+
+        Returns:
+            None
+        """
         self.filename = filename
         extension = Path(filename).suffix.lower()
         if extension == ".gef":
-            self._read_gef(filename)
+            if header_only:
+                self._read_gef_header(filename, count_rows)
+            else:
+                self._read_gef(filename)
         else:
             raise NotImplementedError(f"Unknown and unhandled file extension {extension}")
     
@@ -129,6 +185,25 @@ class Borehole(BaseModel):
 
         self.read_from_gef_stringlist(lines)
 
+    def _read_gef_header(self, filename: str, count_rows: bool) -> None:
+        """
+        Read only the header of a GEF file, the location of the data block 
+        is stored in data_offset and (optionally) the number of rows in num_datarows
+
+        Args:
+            filename (str): the name of the file to be read
+            count_rows (bool): count the datarows
+
+        Returns:
+            None
+        """
+        lines, self.data_offset, self.num_datarows = read_gef_header(filename, count_rows=count_rows)
+
+        # remove empty lines
+        lines = [line.strip() for line in lines if len(line.strip())>0]
+
+        self.read_from_gef_stringlist(lines)
+
     def _parse_header_line(self, line: str, metadata: dict) -> None:
         try:
             keyword, argline = line.split("=")
@@ -240,17 +315,13 @@ class Borehole(BaseModel):
         self.soillayers = result
     
     def _hdsrcode(self, _soilcode: str) -> str:
-        for soilcode, shortcodes in BOREHOLE_CODES.items():
-            for shortcode in shortcodes:
-                if _soilcode.find(shortcode) > -1:
-                    return soilcode   
-        return None
+        return _translate_soilcode(_soilcode)
 
     def convert(self) -> None:
         for soillayer in self.soillayers:
             scode = self._hdsrcode(soillayer.soilcode)
             if scode is None:
-                raise ValueError(f"No translation for soilcode {soillayer.soilcode} to HDSR soilcode yet. Please add to the right relation using the BOREHOLE_CODES dictionary in borehole.py")
+                raise ValueError(f"No translation for soilcode {soillayer.soilcode} to HDSR soilcode yet. Please add to the right relation using the BOREHOLE_CODES dictionary in settings.py")
             soillayer.soilcode = scode
         self._merge_layers()
 
@@ -271,16 +342,16 @@ class Borehole(BaseModel):
         ax = fig.add_subplot()
         ax.set_xlim(0,1)
         plt.title(self.name)
-        for soillayer in self.soillayers:
-            facecolor = HDSR_SOIL_COLORS[soillayer.soilcode]
-            ax.add_patch(
-                patches.Rectangle(
-                    (0.2, soillayer.z_bottom),
-                    0.6,
-                    soillayer.height,
-                    fill=True,
-                    facecolor=facecolor,
-                )
+        if len(self.soillayers) > 0:
+            ax.add_collection(
+                soillayer_collection(
+                    0.2, 
+                    0.8, 
+                    [sl.z_top for sl in self.soillayers], 
+                    [sl.z_bottom for sl in self.soillayers], 
+                    [sl.soilcode for sl in self.soillayers]
+                ),
+                autolim=False
             )
         ax.set_ylim(self.z_min - 1, self.z_top + 1)
         ax.grid(axis="y")
@@ -291,8 +362,8 @@ class Borehole(BaseModel):
             if len(filename)==0:
                 filename = f"{self.name}.png"
             path = Path(filepath) / filename
-            plt.savefig(path)
+            fig.savefig(path)
 
-        plt.close()
+        plt.close(fig)
 
 
@@ -1,4 +1,6 @@
 from builtins import enumerate
+from typing import Tuple
+import numpy as np
 
 class RDWGS84Converter(object):
     x0 = 155000
@@ -45,4 +47,36 @@ class RDWGS84Converter(object):
         x = self.x0 + sum([v * dlat ** self.Rp[i] * dlon ** self.Rq[i] for i, v in enumerate(self.Rpq)])
         y = self.y0 + sum([v * dlat ** self.Sp[i] * dlon ** self.Sq[i] for i, v in enumerate(self.Spq)])
 
-        return x, y
\ No newline at end of file
+        return x, y
+
+    def _series(self, a: np.array, b: np.array, P: list, Q: list, C: list) -> np.array:
+        """
+        Evaluates the sum of C[i] * a**P[i] * b**Q[i] term by term in the same order and with
+        the same operations as from_rd / from_wgs84 so the results are bit-identical
+        """
+        result = 0
+        for p, q, c in zip(P, Q, C):
+            result = result + c * a ** p * b ** q
+        return result
+
+    def from_rd_array(self, x: np.array, y: np.array) -> Tuple[np.array, np.array]:
+        """
+        Converts arrays of RD coordinates into WGS84 coordinates
+        """
+        dx = 1E-5 * (np.asarray(x, dtype=float) - self.x0)
+        dy = 1E-5 * (np.asarray(y, dtype=float) - self.y0)
+        latitude = self.phi0 + self._series(dx, dy, self.Kp, self.Kq, self.Kpq) / 3600
+        longitude = self.lam0 + self._series(dx, dy, self.Lp, self.Lq, self.Lpq) / 3600
+
+        return latitude, longitude
+
+    def from_wgs84_array(self, latitude: np.array, longitude: np.array) -> Tuple[np.array, np.array]:
+        """
+        Converts arrays of WGS84 coordinates into RD coordinates
+        """
+        dlat = 0.36 * (np.asarray(latitude, dtype=float) - self.phi0)
+        dlon = 0.36 * (np.asarray(longitude, dtype=float) - self.lam0)
+        x = self.x0 + self._series(dlat, dlon, self.Rp, self.Rq, self.Rpq)
+        y = self.y0 + self._series(dlat, dlon, self.Sp, self.Sq, self.Spq)
+
+        return x, y
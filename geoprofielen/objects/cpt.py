@@ -8,22 +8,23 @@ __email__ = "breinbaasnl@gmail.com"
 __status__ = "Development"
 
 from pydantic import BaseModel
-from typing import List
+from typing import List, Tuple
 from pathlib import Path
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
-import matplotlib.patches as patches
 from matplotlib.ticker import MultipleLocator
-import math
 
 from enum import IntEnum
 
 from pydantic.utils import KeyType
 
 from .soillayer import SoilLayer
-from ..settings import HDSR_SOIL_COLORS, DEFAULT_MINIMUM_LAYERHEIGHT
+from .gefcache import GEFCache
+from .plotting import soillayer_collection
+from ..helpers import read_gef_header
+from ..settings import DEFAULT_MINIMUM_LAYERHEIGHT
 
 class ConversionType(IntEnum):
     THREE_TYPE_RULE = 0
@@ -40,6 +41,14 @@ GEF_COLUMN_FS = 3
 GEF_COLUMN_U = 6
 GEF_COLUMN_Z_CORRECTED = 11
 
+# column layout of the CPT data array
+CPT_COLUMNS = ["z", "qc", "fs", "Rf", "u"]
+CPT_COLUMN_Z = 0
+CPT_COLUMN_QC = 1
+CPT_COLUMN_FS = 2
+CPT_COLUMN_RF = 3
+CPT_COLUMN_U = 4
+
 NEN5140 = [
     ['veen',8.1], # immediate translation to HDSR soils
         ['veen',5],
@@ -55,17 +64,207 @@ NEN5140 = [
         ['zand',0.6],
         ['zand',0.0]
     ]
+NEN5140_SOILCODES = np.array([soilcode for soilcode, _ in NEN5140] + [""])
+NEN5140_RF = np.array([Rf for _, Rf in NEN5140])
+
+def _nen_5104_soilcodes(cptdata: np.array) -> np.array:
+    """
+    Classify the rows of filtered CPT data (see CPT.filter) using the NEN5140 table
+
+    Args:
+        cptdata (np.array): the filtered cpt data
+
+    Returns:
+        np.array: the soilcode per row, an empty string if the row could not be classified
+    """
+    # the thresholds are decreasing so digitize returns the first index where Rf >= threshold
+    Rf = cptdata[:,4]
+    idx = np.digitize(Rf, NEN5140_RF)
+    idx[np.isnan(Rf)] = len(NEN5140_RF)
+    return NEN5140_SOILCODES[idx]
+
+def _three_type_rule_soilcodes(cptdata: np.array) -> np.array:
+    """
+    Classify the rows of filtered CPT data (see CPT.filter) using the three type rule
+
+    Args:
+        cptdata (np.array): the filtered cpt data
+
+    Returns:
+        np.array: the soilcode per row
+    """
+    x = np.clip(cptdata[:,4], 0, 10)
+    y = np.clip(np.log(cptdata[:,2]), -1, 2)
+
+    # klei_siltig is eigenlijk gewoon klei maar dat is geen optie in de HDSR verzameling dus maar de slapste klei
+    return np.where(
+        y <= x * 0.4 - 2, 
+        np.where(x < 4, "klei_siltig", "veen"),
+        np.where(y > x * 0.4 - 0.30103, "zand", "klei_siltig")
+    )
+
+# Robertson soil behaviour type zones based on Isbt or Ic with the translation to HDSR soils
+# the soil is classified by the first row where the index is larger than the given value
+ROBERTSON_IC = [
+    ['veen', 3.6], # zone 2, organic soils - peat
+    ['klei_siltig', 2.95], # zone 3, clays - silty clay to clay
+    ['klei_zandig', 2.6], # zone 4, silt mixtures - clayey silt to silty clay
+    ['zand', 2.05], # zone 5, sand mixtures - silty sand to sandy silt
+    ['zand', 1.31], # zone 6, sands - clean sand to silty sand
+    ['zand', 0.0] # zone 7, gravelly sand to dense sand
+]
+ROBERTSON_SOILCODES = np.array([soilcode for soilcode, _ in ROBERTSON_IC] + [""])
+ROBERTSON_IC_LIMITS = np.array([Ic for _, Ic in ROBERTSON_IC])
+
+PA = 0.1 # atmospheric pressure [MPa]
+GAMMA_WATER = 10. # unit weight of water [kN/m3]
+GAMMA_DEFAULT = 18. # unit weight for the soil above the first measurement [kN/m3]
+GAMMA_MIN, GAMMA_MAX = 11., 22. # limits of the estimated unit weight [kN/m3]
+CONE_AREA_RATIO = 0.8 # net area ratio of the cone used to correct qc to qt
+SBTN_MAX_ITERATIONS = 100
+SBTN_TOLERANCE = 0.01
+
+def _robertson_soilcodes(Ic: np.array) -> np.array:
+    """
+    Translate Isbt or Ic values to HDSR soilcodes using the ROBERTSON_IC zones
+
+    Args:
+        Ic (np.array): the soil behaviour type index
+
+    Returns:
+        np.array: the soilcode per row, an empty string if the row could not be classified
+    """
+    # the limits are decreasing so with right=True digitize returns the first index where Ic > limit
+    idx = np.digitize(Ic, ROBERTSON_IC_LIMITS, right=True)
+    idx[np.isnan(Ic)] = len(ROBERTSON_IC_LIMITS)
+    return ROBERTSON_SOILCODES[idx]
+
+def _sbt_index(cptdata: np.array) -> np.array:
+    """
+    Calculate the non normalized soil behaviour type index Isbt (Robertson, 2010) for 
+    the rows of filtered CPT data (see CPT.filter)
+
+    Args:
+        cptdata (np.array): the filtered cpt data
+
+    Returns:
+        np.array: Isbt per row
+    """
+    qt = cptdata[:,2] + cptdata[:,5] * (1 - CONE_AREA_RATIO)
+    qt = np.where(qt > 0, qt, cptdata[:,2])
+    return np.sqrt((3.47 - np.log10(qt / PA))**2 + (np.log10(cptdata[:,4]) + 1.22)**2)
+
+def _sbtn_index(cptdata: np.array, stresses: np.array) -> Tuple[np.array, np.array]:
+    """
+    Calculate the normalized soil behaviour type index Ic (Robertson, 2009) for the rows
+    of filtered CPT data (see CPT.filter) with the iteration for the stress exponent n
+
+    Args:
+        cptdata (np.array): the filtered cpt data
+        stresses (np.array): the total and effective vertical stress per row (see CPT._stresses)
+
+    Returns:
+        Tuple[np.array, np.array]: Ic and the stress exponent n per row
+    """
+    sigma_v0, sigma_v0_eff = stresses[:,0], stresses[:,1]
+    qt = cptdata[:,2] + cptdata[:,5] * (1 - CONE_AREA_RATIO)
+    qt = np.where(qt > 0, qt, cptdata[:,2])
+    qnet = np.maximum(qt - sigma_v0, 1e-3)
+    Fr = np.maximum(cptdata[:,3] / qnet * 100., 1e-3)
+
+    n = np.ones(len(qnet))
+    for _ in range(SBTN_MAX_ITERATIONS):
+        Qtn = (qnet / PA) * (PA / sigma_v0_eff)**n
+        Ic = np.sqrt((3.47 - np.log10(Qtn))**2 + (np.log10(Fr) + 1.22)**2)
+        n_new = np.minimum(0.381 * Ic + 0.05 * sigma_v0_eff / PA - 0.15, 1.0)
+        converged = np.all(~(np.abs(n_new - n) >= SBTN_TOLERANCE))
+        n = n_new
+        if converged:
+            break
+
+    Qtn = (qnet / PA) * (PA / sigma_v0_eff)**n
+    Ic = np.sqrt((3.47 - np.log10(Qtn))**2 + (np.log10(Fr) + 1.22)**2)
+    return Ic, n
+
+def _sbt_soilcodes(cptdata: np.array, stresses: np.array) -> np.array:
+    """
+    Classify the rows of filtered CPT data (see CPT.filter) using the non normalized
+    soil behaviour type index Isbt (Robertson, 2010)
+
+    Args:
+        cptdata (np.array): the filtered cpt data
+        stresses (np.array): the total and effective vertical stress per row (see CPT._stresses), rows with nan values are skipped
+
+    Returns:
+        np.array: the soilcode per row, an empty string if the row could not be classified
+    """
+    Isbt = _sbt_index(cptdata)
+    Isbt[np.isnan(stresses[:,0])] = np.nan
+    return _robertson_soilcodes(Isbt)
+
+def _sbtn_soilcodes(cptdata: np.array, stresses: np.array) -> np.array:
+    """
+    Classify the rows of filtered CPT data (see CPT.filter) using the normalized
+    soil behaviour type index Ic (Robertson, 2009)
+
+    Args:
+        cptdata (np.array): the filtered cpt data
+        stresses (np.array): the total and effective vertical stress per row (see CPT._stresses), rows with nan values are skipped
+
+    Returns:
+        np.array: the soilcode per row, an empty string if the row could not be classified
+    """
+    Ic, _ = _sbtn_index(cptdata, stresses)
+    return _robertson_soilcodes(Ic)
+
+def _soillayers_from_soilcodes(cptdata: np.array, soilcodes: np.array, offsets: np.array = None) -> List[List[SoilLayer]]:
+    """
+    Create the soillayers from the filtered CPT data and the soilcodes per row,
+    consecutive rows with the same soilcode are merged into one soillayer and 
+    rows without soilcode are skipped
+
+    Args:
+        cptdata (np.array): the filtered cpt data of one or more cpts
+        soilcodes (np.array): the soilcode per row
+        offsets (np.array): the first row of every cpt plus the total number of rows, default None (one cpt)
+
+    Returns:
+        List[List[SoilLayer]]: the list of soillayers per cpt
+    """
+    if offsets is None:
+        offsets = np.array([0, len(soilcodes)])
+    segments = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+    valid = soilcodes != ""
+    z_tops = np.round(cptdata[valid,0], 2)
+    z_bottoms = np.round(cptdata[valid,1], 2)
+    soilcodes = soilcodes[valid]
+    segments = segments[valid]
+
+    # the first row of every run of equal soilcodes within the same cpt
+    breaks = (soilcodes[1:] != soilcodes[:-1]) | (segments[1:] != segments[:-1])
+    starts = np.flatnonzero(np.concatenate(([True], breaks))) if len(soilcodes) > 0 else np.array([], dtype=int)
+    ends = np.append(starts[1:], len(soilcodes)) - 1
+
+    soillayers = [
+        SoilLayer(z_top=z_top, z_bottom=z_bottom, soilcode=soilcode)
+        for z_top, z_bottom, soilcode in zip(z_tops[starts].tolist(), z_bottoms[ends].tolist(), soilcodes[starts].tolist())
+    ]
+
+    # split the soillayers per cpt
+    splits = np.cumsum(np.bincount(segments[starts], minlength=len(offsets) - 1))
+    return [soillayers[i1:i2] for i1, i2 in zip(np.concatenate(([0], splits[:-1])).tolist(), splits.tolist())]
 
 class CPT(BaseModel):
+    class Config:
+        arbitrary_types_allowed = True
+
     x: float = 0.0
     y: float = 0.0
     z_top: float = 0.0
 
-    z: List[float] = []
-    qc: List[float] = []
-    fs: List[float] = []
-    u: List[float] = []
-    Rf: List[float] = []
+    # all measurements in one array, see CPT_COLUMNS for the layout
+    data: np.ndarray = np.empty((0, len(CPT_COLUMNS)))
 
     name: str = ""
     
@@ -75,12 +274,25 @@ class CPT(BaseModel):
     soillayers: List[SoilLayer] = []
     filename: str = ""
 
+    data_offset: int = -1 # byte offset of the data block (header only mode)
+    num_datarows: int = -1 # number of rows in the data block (header only mode with count_rows)
+
     pre_excavated_depth: float = 0.0
 
     @classmethod
-    def from_file(self, filename: str) -> 'CPT':
+    def from_file(self, filename: str, header_only: bool = False, count_rows: bool = False) -> 'CPT':
+        # full reads are cached (if GEF_CACHE_PATH is set), header only reads are cheap enough as they are
+        gefcache = GEFCache()
+        if not header_only:
+            cpt = gefcache.load(filename, tag="CPT")
+            if cpt is not None:
+                return cpt
+
         cpt = CPT()
-        cpt.read(filename)
+        cpt.read(filename, header_only=header_only, count_rows=count_rows)
+
+        if not header_only:
+            gefcache.save(filename, cpt, tag="CPT")
         return cpt
 
     @property
@@ -99,6 +311,48 @@ class CPT(BaseModel):
         else:
             raise ValueError("This geffile has no date or invalid date information.")
 
+    # the measurements can also be used as lists like before the data was stored in one array,
+    # these are copies so use as_numpy() to work on the data itself
+    def __init__(self, **data):
+        columns = {name: data.pop(name) for name in CPT_COLUMNS if name in data}
+        super().__init__(**data)
+        for name, values in columns.items():
+            setattr(self, name, values)
+
+    def __setattr__(self, name, value):
+        if name in CPT_COLUMNS:
+            self._set_column(name, value)
+        else:
+            super().__setattr__(name, value)
+
+    def _set_column(self, name: str, values: List[float]) -> None:
+        values = np.asarray(values, dtype=float)
+        if self.data.shape[0] == 0:
+            super().__setattr__("data", np.zeros((len(values), len(CPT_COLUMNS))))
+        elif self.data.shape[0] != len(values):
+            raise ValueError(f"Can not set {name} with {len(values)} values, the CPT has {self.data.shape[0]} rows")
+        self.data[:,CPT_COLUMNS.index(name)] = values
+
+    @property
+    def z(self) -> List[float]:
+        return self.data[:,CPT_COLUMN_Z].tolist()
+
+    @property
+    def qc(self) -> List[float]:
+        return self.data[:,CPT_COLUMN_QC].tolist()
+
+    @property
+    def fs(self) -> List[float]:
+        return self.data[:,CPT_COLUMN_FS].tolist()
+
+    @property
+    def Rf(self) -> List[float]:
+        return self.data[:,CPT_COLUMN_RF].tolist()
+
+    @property
+    def u(self) -> List[float]:
+        return self.data[:,CPT_COLUMN_U].tolist()
+
     @property
     def length(self) -> float:
         return self.z_top - self.z_min
@@ -114,7 +368,7 @@ class CPT(BaseModel):
         Returns:
             float: deepest point in CPT
         """
-        return self.z[-1]
+        return float(self.data[-1,CPT_COLUMN_Z])
 
     @property 
     def has_u(self) -> bool:
@@ -127,7 +381,7 @@ class CPT(BaseModel):
         Return:
             bool: true is CPT has waterpressure readings, false otherwise
         """
-        return max(self.u) > 0 or min(self.u) < 0
+        return bool(np.any(self.data[:,CPT_COLUMN_U] != 0.0))
 
     def read_from_gef_stringlist(self, lines: List[str]) -> None:
         """
@@ -139,29 +393,40 @@ class CPT(BaseModel):
         Returns:
             None
         """
-        reading_header = True
         metadata = {
             "record_seperator":"",
             "column_seperator":" ",
             "columnvoids":{}, 
             "columninfo":{}
         }
-        for line in lines:
-            if reading_header:
-                if line.find("#EOH") >= 0:
-                    reading_header = False
-                else:
-                    self._parse_header_line(line, metadata)
+        for i, line in enumerate(lines):
+            if line.find("#EOH") >= 0:
+                self._parse_data_block(lines[i+1:], metadata)
+                break
             else:
-                self._parse_data_line(line, metadata)
+                self._parse_header_line(line, metadata)
 
         self._calculate()
 
-    def read(self, filename: str) -> None:
+    def read(self, filename: str, header_only: bool = False, count_rows: bool = False) -> None:
+        """
+        Read a file
+
+        Args:
+            filename (str): the name of the file to be read
+            header_only (bool): only read the header metadata, default False
+            count_rows (bool): count the datarows in header only mode, default False
+
+        Returns:
+            None
+        """
         self.filename = filename
         extension = Path(filename).suffix.lower()
         if extension == ".gef":
-            self._read_gef(filename)
+            if header_only:
+                self._read_gef_header(filename, count_rows)
+            else:
+                self._read_gef(filename)
         else:
             raise NotImplementedError(f"Unknown and unhandled file extension {extension}")
     
@@ -179,6 +444,22 @@ class CPT(BaseModel):
 
         self.read_from_gef_stringlist(lines)
 
+    def _read_gef_header(self, filename: str, count_rows: bool) -> None:
+        """
+        Read only the header of a GEF file, the location of the data block 
+        is stored in data_offset and (optionally) the number of rows in num_datarows
+
+        Args:
+            filename (str): the name of the file to be read
+            count_rows (bool): count the datarows
+
+        Returns:
+            None
+        """
+        lines, self.data_offset, self.num_datarows = read_gef_header(filename, count_rows=count_rows)
+
+        self.read_from_gef_stringlist(lines)
+
     def _calculate(self) -> None:
         """
         Calculate other parameters from the qc and fs values
@@ -188,11 +469,11 @@ class CPT(BaseModel):
 
         Returns:
             None"""
-        for qc, fs in zip(self.qc, self.fs):
-            if qc == 0.0:
-                self.Rf.append(RF_MAX)
-            else:
-                self.Rf.append(fs / qc * 100.)
+        qc, fs = self.data[:,CPT_COLUMN_QC], self.data[:,CPT_COLUMN_FS]
+        Rf = np.full(qc.shape, RF_MAX)
+        np.divide(fs, qc, out=Rf, where=qc != 0.0)
+        Rf[qc != 0.0] *= 100.
+        self.data[:,CPT_COLUMN_RF] = Rf
 
     def _parse_header_line(self, line: str, metadata: dict) -> None:
         try:
@@ -266,44 +547,69 @@ class CPT(BaseModel):
             except:                
                 self.startdate = ""
         
-    def _parse_data_line(self, line: str, metadata: dict) -> None:
+    def _parse_data_block(self, lines: List[str], metadata: dict) -> None:
+        """
+        Parse all lines after #EOH in one pass into a 2D array and derive
+        the z, qc, fs and u columns using whole array operations
+
+        Args:
+            lines (List[str]): the lines of the data block
+            metadata (dict): the metadata as read from the header
+
+        Returns:
+            None
+        """
+        text = "\n".join(lines)
+        if len(metadata["record_seperator"]) > 0:
+            text = text.replace(metadata["record_seperator"], "")
+        if len(metadata["column_seperator"]) > 0:
+            text = text.replace(metadata["column_seperator"], " ")
+
+        tokens = text.split()
+        if len(tokens) == 0:
+            return
+
+        # the first non empty row defines the number of columns, all other rows should have the same number of columns
+        rowcounts = np.array([len(row.split()) for row in text.split("\n")])
+        rowcounts = rowcounts[rowcounts > 0]
+        numcolumns = rowcounts[0]
+        if np.any(rowcounts != numcolumns):
+            row = np.flatnonzero(rowcounts != numcolumns)[0]
+            raise ValueError(f"Error reading datablock -> inconsistent number of columns in data row {row + 1}, expected {numcolumns} columns but got {rowcounts[row]}")
+
         try:
-            if len(line.strip())==0: return
-            args = line.replace(metadata["record_seperator"], '').strip().split(metadata["column_seperator"])
-            args = [float(arg.strip()) for arg in args if len(arg.strip()) > 0 and arg.strip() != metadata["record_seperator"]]
-            
-            # skip lines that have a columnvoid
-            for col_index, voidvalue in metadata["columnvoids"].items():
-                if args[col_index] == voidvalue:
-                    return  
+            data = np.array(tokens, dtype=float).reshape(-1, numcolumns)
+        except Exception as e:
+            raise ValueError(f"Error reading datablock -> error {e}")
+
+        # skip rows that have a columnvoid
+        valid = np.ones(data.shape[0], dtype=bool)
+        for col_index, voidvalue in metadata["columnvoids"].items():
+            if col_index >= numcolumns:
+                raise ValueError(f"Error reading datablock -> columnvoid defined for non existing column {col_index + 1}")
+            valid &= data[:,col_index] != voidvalue
+        data = data[valid]
 
+        try:
             zcolumn = metadata["columninfo"][GEF_COLUMN_Z]
             qccolumn = metadata["columninfo"][GEF_COLUMN_QC]
             fscolumn = metadata["columninfo"][GEF_COLUMN_FS]
+            ucolumn = metadata["columninfo"].get(GEF_COLUMN_U, -1)
 
-            ucolumn = -1
-            if GEF_COLUMN_U in metadata["columninfo"].keys():
-                ucolumn = metadata["columninfo"][GEF_COLUMN_U]
-
-            dz = self.z_top - abs(args[zcolumn])            
-            self.z.append(dz)
-
-            qc = args[qccolumn]
-            if qc <= 0:
-                qc = 1e-3
-            self.qc.append(qc)
-            fs = args[fscolumn]
-            if fs <= 0:
-                fs = 1e-6
-            self.fs.append(fs)
+            z = self.z_top - np.abs(data[:,zcolumn])
+            qc = data[:,qccolumn]
+            qc = np.where(qc <= 0, 1e-3, qc)
+            fs = data[:,fscolumn]
+            fs = np.where(fs <= 0, 1e-6, fs)
 
             if ucolumn > -1:
-                self.u.append(args[ucolumn])
+                u = data[:,ucolumn]
             else:
-                self.u.append(0.0)
-
+                u = np.zeros(data.shape[0])
         except Exception as e:
-            raise ValueError(f"Error reading dataline '{line}' -> error {e}") 
+            raise ValueError(f"Error reading datablock -> missing or invalid column {e}")
+
+        self.data = np.column_stack((z, qc, fs, np.zeros(data.shape[0]), u))
 
     def as_numpy(self) -> np.array:
         """
@@ -316,25 +622,28 @@ class CPT(BaseModel):
         3       Rf
         4       u
 
+        Note that this is not a copy so changes to the array will change the CPT data
+
         Args:
             None
 
         Returns:
             np.array: the CPT data as a numpy array"""
-        return np.transpose(np.array([self.z, self.qc, self.fs, self.Rf, self.u]))
+        return self.data
     
     def as_dataframe(self) -> pd.DataFrame:
         """
         Return the CPT data as a dataframe with columns;        
         z, qc, fs, Rf, u
 
+        Note that the dataframe shares its data with the CPT, use copy() if you want to change it
+
         Args:
             None
 
         Returns:
             pd.DataFrame: the CPT data as a DataFrame"""
-        data = self.as_numpy()
-        return pd.DataFrame(data=data, columns=["z", "qc", "fs", "Rf", "u"])
+        return pd.DataFrame(data=self.data, columns=CPT_COLUMNS, copy=False)
     
     def plot(self, size_x: float = 10, size_y: float = 12, filepath: str ="", filename: str="") -> None:
         """Plot the CPT
@@ -361,15 +670,14 @@ class CPT(BaseModel):
         ax_qc.set_xlim(0,QC_MAX)
         plt.title(self.name)
 
-        for soillayer in self.soillayers:
-            facecolor = HDSR_SOIL_COLORS[soillayer.soilcode]
-            ax_qc.add_patch(
-                patches.Rectangle(
-                    (40, soillayer.z_bottom),
-                    10,
-                    soillayer.height,
-                    fill=True,
-                    facecolor=facecolor,
+        if len(self.soillayers) > 0:
+            ax_qc.add_collection(
+                soillayer_collection(
+                    40, 
+                    50, 
+                    [sl.z_top for sl in self.soillayers], 
+                    [sl.z_bottom for sl in self.soillayers], 
+                    [sl.soilcode for sl in self.soillayers]
                 )
             )
 
@@ -395,9 +703,9 @@ class CPT(BaseModel):
             if len(filename)==0:
                 filename = f"{self.name}.png"
             path = Path(filepath) / filename
-            plt.savefig(path)
+            fig.savefig(path)
 
-        plt.close()
+        plt.close(fig)
 
     def filter(self, minimum_layer_height: float = DEFAULT_MINIMUM_LAYERHEIGHT) -> np.array:
         """Return the CPT data as a numpy array with;
@@ -415,40 +723,52 @@ class CPT(BaseModel):
 
         Returns:
             np.array: the CPT data as a numpy array"""
-        a = self.as_numpy()
-        ls = np.arange(self.z[0], self.z[-1] - DEFAULT_MINIMUM_LAYERHEIGHT, -minimum_layer_height)
-        
-        result = []
-        for i in range(1, len(ls)):
-            ztop = ls[i-1]    
-            zbot = ls[i]
-            selection = a[(a[:,0] <= ztop) & (a[:,0] >= zbot)]
-            layer = np.array([ztop, zbot])
-            mean = np.mean(selection[:,1:], axis=0)
-            result.append(np.concatenate((layer, mean), axis=None))
-
-        return np.array(result)
-
-    def _merge_layers(self) -> None:
-        """Merge consecutive layers if they have the same soil code
+        ls = np.arange(self.data[0,CPT_COLUMN_Z], self.data[-1,CPT_COLUMN_Z] - DEFAULT_MINIMUM_LAYERHEIGHT, -minimum_layer_height)
+        return self.average(ls[:-1], ls[1:])
+
+    def average(self, z_tops: np.array, z_bottoms: np.array) -> np.array:
+        """Return the average values of the CPT data for the given intervals, the
+        intervals include both the top and the bottom value. Intervals without
+        data will have nan values. The result is a numpy array with;
         
+        col     value
+        0       ztop
+        1       zbot
+        2       qc
+        3       fs
+        4       Rf
+        5       u
+
         Args:
-            None
+            z_tops (np.array): the top of the intervals
+            z_bottoms (np.array): the bottom of the intervals
 
         Returns:
-            None
-        """
-        # merge layers with same name
-        result = []
-        for i in range(len(self.soillayers)):
-            if i==0:
-                result.append(self.soillayers[i])
-            else:
-                if self.soillayers[i].soilcode == result[-1].soilcode:
-                    result[-1].z_bottom = self.soillayers[i].z_bottom
-                else:
-                    result.append(self.soillayers[i])
-        self.soillayers = result
+            np.array: the averaged CPT data as a numpy array"""
+        z_tops = np.asarray(z_tops, dtype=float)
+        z_bottoms = np.asarray(z_bottoms, dtype=float)
+        a = self.data
+
+        # we need ascending z values for searchsorted, the data is (almost) always 
+        # from top to bottom so reversing is enough, else sort the data
+        if np.all(a[1:,CPT_COLUMN_Z] <= a[:-1,CPT_COLUMN_Z]):
+            a = a[::-1]
+        else:
+            a = a[np.argsort(a[:,CPT_COLUMN_Z], kind="stable")]
+
+        # prefix sums of qc, fs, Rf and u with a leading row of zeros
+        cumsum = np.zeros((a.shape[0] + 1, a.shape[1] - 1))
+        np.cumsum(a[:,1:], axis=0, out=cumsum[1:])
+
+        ibot = np.searchsorted(a[:,CPT_COLUMN_Z], z_bottoms, side="left")
+        itop = np.searchsorted(a[:,CPT_COLUMN_Z], z_tops, side="right")
+        count = np.maximum(itop - ibot, 0)
+
+        mean = np.full((len(z_tops), a.shape[1] - 1), np.nan)
+        valid = count > 0
+        mean[valid] = (cumsum[itop[valid]] - cumsum[ibot[valid]]) / count[valid, np.newaxis]
+
+        return np.column_stack((z_tops, z_bottoms, mean))
 
     def _convert_nen_5014(self, minimum_layer_height: float) -> List[SoilLayer]:
         """
@@ -460,16 +780,8 @@ class CPT(BaseModel):
         Returns:
             List[SoilLayer]: the list of soillayers
         """
-        self.soillayers = []             
         cptdata = self.filter(minimum_layer_height)
-        for row in cptdata:
-            Rf = row[4]
-            for soilcode, _Rf in NEN5140:
-                if Rf >= _Rf:
-                    self.soillayers.append(SoilLayer(z_top=round(row[0],2), z_bottom=round(row[1],2), soilcode=soilcode))
-                    break
-
-        self._merge_layers()
+        self.soillayers = _soillayers_from_soilcodes(cptdata, _nen_5104_soilcodes(cptdata))[0]
     
     def _convert_three_type_rule(self, minimum_layer_height: float) -> List[SoilLayer]:
         """
@@ -481,39 +793,66 @@ class CPT(BaseModel):
         Returns:
             List[SoilLayer]: the list of soillayers
         """
-        #     0     1     2       3       4      5
-        # get ztop, zbot, qc_avg, fs_avg, Rf_avg u_avg matrix   
-        self.soillayers = []             
         cptdata = self.filter(minimum_layer_height)
-        for row in cptdata:
-            x = row[4]
-            y = math.log(row[2])
-            
-            if x<0: x=0
-            if x>10: x=10
-            if y<-1: y=-1
-            if y>2: y=2
-
-            soilcode = ""
-            if y <= x * 0.4 - 2:
-                if x < 4:                    
-                    soilcode = "klei_siltig" # eigenlijk gewoon klei maar dat is geen optie in de HDSR verzameling dus maar de slapste klei
-                else:
-                    soilcode = "veen"
-            elif y > x * 0.4 - 0.30103:
-                soilcode = "zand"
-            else:
-                soilcode = "klei_siltig" # idem vorige opmerking
+        self.soillayers = _soillayers_from_soilcodes(cptdata, _three_type_rule_soilcodes(cptdata))[0]
+
+    def _stresses(self, cptdata: np.array) -> np.array:
+        """
+        Calculate the total and effective vertical stress in the middle of the rows of 
+        the filtered CPT data. The unit weight is estimated from the cpt values (Robertson 
+        and Cabal, 2010) and the phreatic level is assumed at the top of the cpt. Rows above 
+        the pre excavated depth get nan values.
 
-            self.soillayers.append(SoilLayer(z_top=round(row[0],2), z_bottom=round(row[1],2), soilcode=soilcode))
+        Args:
+            cptdata (np.array): the filtered cpt data
 
-        self._merge_layers()
+        Returns:
+            np.array: the total (col 0) and effective (col 1) vertical stress in MPa
+        """
+        if len(cptdata) == 0:
+            return np.empty((0, 2))
+
+        qt = cptdata[:,2] + cptdata[:,5] * (1 - CONE_AREA_RATIO)
+        qt = np.where(qt > 0, qt, cptdata[:,2])
+        gamma = GAMMA_WATER * (0.27 * np.log10(cptdata[:,4]) + 0.36 * np.log10(qt / PA) + 1.236)
+        gamma = np.clip(np.nan_to_num(gamma, nan=GAMMA_DEFAULT), GAMMA_MIN, GAMMA_MAX)
+
+        # stress at the top of every row plus half of the row itself
+        heights = cptdata[:,0] - cptdata[:,1]
+        sigma_top = GAMMA_DEFAULT * (self.z_top - cptdata[0,0]) + np.concatenate(([0.], np.cumsum(gamma * heights)[:-1]))
+        sigma_v0 = (sigma_top + 0.5 * gamma * heights) / 1000.
+        depth = self.z_top - (cptdata[:,0] + cptdata[:,1]) / 2.
+        sigma_v0_eff = sigma_v0 - GAMMA_WATER * depth / 1000.
+
+        result = np.column_stack((sigma_v0, sigma_v0_eff))
+        result[self.z_top - cptdata[:,0] < self.pre_excavated_depth - 1e-6] = np.nan # small tolerance for the rounding of the filter depths
+        return result
 
     def _convert_sbt(self, minimum_layer_height: float) -> List[SoilLayer]:
-        return []
+        """
+        Conversion function for the non normalized soil behaviour type (Robertson, 2010)
+
+        Args:
+            None
+
+        Returns:
+            List[SoilLayer]: the list of soillayers
+        """
+        cptdata = self.filter(minimum_layer_height)
+        self.soillayers = _soillayers_from_soilcodes(cptdata, _sbt_soilcodes(cptdata, self._stresses(cptdata)))[0]
 
     def _convert_sbtn(self, minimum_layer_height: float) -> List[SoilLayer]:
-        return []
+        """
+        Conversion function for the normalized soil behaviour type (Robertson, 2009)
+
+        Args:
+            None
+
+        Returns:
+            List[SoilLayer]: the list of soillayers
+        """
+        cptdata = self.filter(minimum_layer_height)
+        self.soillayers = _soillayers_from_soilcodes(cptdata, _sbtn_soilcodes(cptdata, self._stresses(cptdata)))[0]
     
     def convert(self, conversion_type: ConversionType = ConversionType.THREE_TYPE_RULE, minimum_layer_height: float=DEFAULT_MINIMUM_LAYERHEIGHT) -> List[SoilLayer]:
         """
@@ -528,10 +867,48 @@ class CPT(BaseModel):
             self._convert_three_type_rule(minimum_layer_height=minimum_layer_height)
         elif conversion_type == ConversionType.NEN_5104:
             self._convert_nen_5014(minimum_layer_height=minimum_layer_height)
+        elif conversion_type == ConversionType.SBT_DUTCH_NON_NORMALIZED:
+            self._convert_sbt(minimum_layer_height=minimum_layer_height)
+        elif conversion_type == ConversionType.SBT_DUTCH_NORMALIZED:
+            self._convert_sbtn(minimum_layer_height=minimum_layer_height)
         else:
             raise NotImplementedError("The given conversion method has not been implemented yet.")
 
+    @classmethod
+    def convert_batch(cls, cpts: List['CPT'], conversion_type: ConversionType = ConversionType.THREE_TYPE_RULE, minimum_layer_height: float=DEFAULT_MINIMUM_LAYERHEIGHT) -> List[List[SoilLayer]]:
+        """
+        Convert a collection of cpts at once, this gives the same result as calling convert
+        on every cpt but the classification is done in one pass over the data of all cpts
 
+        Args:
+            cpts (List[CPT]): the cpts to convert
+            conversion_type (): type of conversion to apply, defaults to three type rule
+            minimum_layer_height (float): minimum layerheight for the soillayers
 
+        Returns:
+            List[List[SoilLayer]]: list of soillayers per cpt
+        """
+        cptdatas = [cpt.filter(minimum_layer_height) for cpt in cpts]
+        offsets = np.cumsum([0] + [len(cptdata) for cptdata in cptdatas])
+        cptdata = np.concatenate(cptdatas) if len(cptdatas) > 0 else np.empty((0, 6))
 
-        
+        if conversion_type == ConversionType.THREE_TYPE_RULE:
+            soilcodes = _three_type_rule_soilcodes(cptdata)
+        elif conversion_type == ConversionType.NEN_5104:
+            soilcodes = _nen_5104_soilcodes(cptdata)
+        elif conversion_type in [ConversionType.SBT_DUTCH_NON_NORMALIZED, ConversionType.SBT_DUTCH_NORMALIZED]:
+            # the stresses depend on the individual cpts
+            stresses = [cpt._stresses(d) for cpt, d in zip(cpts, cptdatas)]
+            stresses = np.concatenate(stresses) if len(stresses) > 0 else np.empty((0, 2))
+            if conversion_type == ConversionType.SBT_DUTCH_NON_NORMALIZED:
+                soilcodes = _sbt_soilcodes(cptdata, stresses)
+            else:
+                soilcodes = _sbtn_soilcodes(cptdata, stresses)
+        else:
+            raise NotImplementedError("The given conversion method has not been implemented yet.")
+
+        result = _soillayers_from_soilcodes(cptdata, soilcodes, offsets)
+        for cpt, soillayers in zip(cpts, result):
+            cpt.soillayers = soillayers
+
+        return result
@@ -0,0 +1,137 @@
+__author__ = "Breinbaas | Rob van Putten"
+__copyright__ = "Copyright 2020"
+__credits__ = ["Rob van Putten"]
+__license__ = "GPL"
+__version__ = "0.1.0"
+__maintainer__ = "Rob van Putten"
+__email__ = "breinbaasnl@gmail.com"
+__status__ = "Development"
+
+import shapefile
+from pathlib import Path
+
+from .geoprofile import Geoprofile
+
+DAM_SEGMENTS_FILE = "segments.csv"
+DAM_SOILPROFILES_FILE = "soilprofiles.csv"
+DAM_LOCATIONSEGMENTS_FILE = "LocationSegments.shp"
+DAM_SEGMENTS_HEADER = "segment_id,soilprofile_id,probability,calculation_type\n"
+DAM_SOILPROFILES_HEADER = "soilprofile_id,top_level,soil_name\n"
+DAM_CALCULATION_TYPES = ["Stability", "Piping"]
+DAM_SOILPROFILE_PREFIX = "profiel_"
+DAM_WRITE_BUFFER = 1024 * 1024 # buffer size in bytes for the csv files
+
+class DAMWriter():
+    """Writes the DAM input (segments.csv, soilprofiles.csv and LocationSegments.shp) for
+    one or more geoprofiles. Every geoprofile is written as soon as it is added so the
+    memory use does not depend on the number of geoprofiles.
+
+    The segment ids are numbered from 1 over all geoprofiles. Exports that are written
+    separately (like one per worker process) can be combined using merge.
+
+    Usage:
+        with DAMWriter(path) as writer:
+            for geoprofile in geoprofiles:
+                writer.write(geoprofile)
+    """
+    def __init__(self, path: str):
+        p = Path(path)
+        p.mkdir(parents=True, exist_ok=True)
+        self.path = str(p)
+        self.segmentid = 0 # the last used segment id
+
+        self._fsegments = open(p / DAM_SEGMENTS_FILE, 'w', buffering=DAM_WRITE_BUFFER)
+        self._fsoilprofiles = open(p / DAM_SOILPROFILES_FILE, 'w', buffering=DAM_WRITE_BUFFER)
+        self._fsegments.write(DAM_SEGMENTS_HEADER)
+        self._fsoilprofiles.write(DAM_SOILPROFILES_HEADER)
+        self._shapes = shapefile.Writer(str(p / DAM_LOCATIONSEGMENTS_FILE))
+        self._shapes.field('segment_id', 'C')
+
+    def __enter__(self) -> "DAMWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._fsegments.close()
+        self._fsoilprofiles.close()
+        self._shapes.close()
+
+    def _write_segment(self, segmentid: int, soilprofile_lines: list) -> None:
+        soilprofile_id = f"{DAM_SOILPROFILE_PREFIX}{segmentid}"
+        for calculation_type in DAM_CALCULATION_TYPES:
+            self._fsegments.write(f"{segmentid},{soilprofile_id},100,{calculation_type}\n")
+        for line in soilprofile_lines:
+            self._fsoilprofiles.write(f"{soilprofile_id},{line}")
+
+    def write(self, geoprofile: Geoprofile) -> None:
+        """Add the soilprofiles of the geoprofile, every soilprofile is a new segment
+
+        Args:
+            geoprofile (Geoprofile): the geoprofile
+
+        Returns:
+            None
+        """
+        # get the geometry first so nothing is written if the geoprofile is invalid
+        reflines = [geoprofile.get_partial_refline(sp.x_left, sp.x_right) for sp in geoprofile.soilprofiles]
+
+        for soilprofile, refline in zip(geoprofile.soilprofiles, reflines):
+            self.segmentid += 1
+            self._write_segment(
+                self.segmentid,
+                [f"{soillayer.z_top:.02f},{soillayer.soilcode}\n" for soillayer in soilprofile.soillayers]
+            )
+            self._shapes.record(f"{self.segmentid}")
+            self._shapes.line([refline])
+
+    def append(self, path: str) -> None:
+        """Add the output of another DAMWriter, the segment ids will be renumbered so they
+        follow the segment ids that are already written. The files are read line by line.
+
+        Args:
+            path (str): the path with the output of the other DAMWriter
+
+        Returns:
+            None
+        """
+        p = Path(path)
+        offset = self.segmentid
+
+        def renumber(soilprofile_id: str) -> str:
+            return f"{DAM_SOILPROFILE_PREFIX}{int(soilprofile_id[len(DAM_SOILPROFILE_PREFIX):]) + offset}"
+
+        with open(p / DAM_SEGMENTS_FILE, 'r', buffering=DAM_WRITE_BUFFER) as f:
+            next(f) # skip header
+            for line in f:
+                segmentid, soilprofile_id, remainder = line.split(",", 2)
+                self._fsegments.write(f"{int(segmentid) + offset},{renumber(soilprofile_id)},{remainder}")
+                self.segmentid = max(self.segmentid, int(segmentid) + offset)
+
+        with open(p / DAM_SOILPROFILES_FILE, 'r', buffering=DAM_WRITE_BUFFER) as f:
+            next(f) # skip header
+            for line in f:
+                soilprofile_id, remainder = line.split(",", 1)
+                self._fsoilprofiles.write(f"{renumber(soilprofile_id)},{remainder}")
+
+        with shapefile.Reader(str(p / DAM_LOCATIONSEGMENTS_FILE)) as sf:
+            for shaperecord in sf.iterShapeRecords():
+                self._shapes.record(f"{int(shaperecord.record['segment_id']) + offset}")
+                self._shapes.shape(shaperecord.shape)
+
+    @classmethod
+    def merge(cls, path: str, part_paths: list) -> None:
+        """Combine the output of multiple DAMWriters into one, the segment ids are
+        renumbered in the order of the given paths
+
+        Args:
+            path (str): the path for the combined output
+            part_paths (list): the paths with the output of the DAMWriters
+
+        Returns:
+            None
+        """
+        with cls(path) as writer:
+            for part_path in part_paths:
+                writer.append(part_path)
@@ -7,77 +7,143 @@ __maintainer__ = "Rob van Putten"
 __email__ = "breinbaasnl@gmail.com"
 __status__ = "Development"
 
-import math
+import os
+import uuid
+import numpy as np
 import psycopg2
-from postgis.psycopg import register
-from postgis import LineString, MultiLineString
-from typing import List
+from psycopg2 import sql
+from psycopg2.pool import ThreadedConnectionPool
+from contextlib import contextmanager
+from typing import Dict, Tuple, Iterator
 
 from .pointrd import PointRD
 from .dijktraject import DijkTraject
-from ..secrets import DB_SERVER, DB_PASSWORD, DB_USER, DB_NAME
+from .referenceline import ReferenceLine
+from .dijktrajectselection import DijkTrajectSelection
+from ..helpers import wkb_to_linestrings
+from ..settings import DB_BATCH_SIZE, DB_MAX_CONNECTIONS, DIJKTRAJECTEN_TABLE
 
-class DBConnector():
-    def __init__(self):        
-        self.conn = psycopg2.connect(
-            host=DB_SERVER,
-            database=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD
+def _default_dsn() -> str:
+    # only import the secrets if we need them so a connection to another
+    # (for example a local test) database does not require the secrets file
+    from ..secrets import DB_SERVER, DB_PASSWORD, DB_USER, DB_NAME
+    return psycopg2.extensions.make_dsn(host=DB_SERVER, dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD)
+
+def _dijktraject_from_row(geom: bytes, id: str, naam: str) -> DijkTraject:
+    """Create a dijktraject from the WKB geometry (in WGS84), id and name of a database record
+
+    Args:
+        geom (bytes): the geometry as WKB
+        id (str): the id of the dijktraject
+        naam (str): the name of the dijktraject
+
+    Returns:
+        DijkTraject: the dijktraject with the referentielijn
+    """
+    linestrings = wkb_to_linestrings(geom)
+    if len(linestrings) == 0 or sum([len(ls) for ls in linestrings]) == 0: # NULL or empty geometry
+        return DijkTraject(id=id, naam=naam, referentielijn=ReferenceLine())
+
+    lon, lat = np.concatenate(linestrings).T
+
+    # convert the WGS84 coords to RD coords in one go
+    x, y = PointRD._coordconvertor.from_wgs84_array(lat, lon)
+    # add chainage to the points (cumulative length, rounded down to whole meters)
+    dl = np.sqrt(np.diff(x)**2 + np.diff(y)**2)
+    chainage = np.concatenate(([0.0], np.cumsum(dl))).astype(np.int64)
+    # remove points with the same chainage, keep the first one
+    _, keep = np.unique(chainage, return_index=True)
+    keep = np.sort(keep)
+                                
+    return DijkTraject(
+        id = id,
+        naam = naam,
+        referentielijn = ReferenceLine(
+            chainage = chainage[keep], 
+            x = x[keep], 
+            y = y[keep], 
+            lat = lat[keep], 
+            lon = lon[keep]
         )
-        register(self.conn)
+    )
+
+
+class DBConnector():
+    # connection pools are shared by all instances, one pool per database and process
+    # (connections can not be shared with forked worker processes)
+    _pools: Dict[Tuple[str, int], ThreadedConnectionPool] = {}
+
+    def __init__(self, dsn: str = "", max_connections: int = DB_MAX_CONNECTIONS):
+        """Connect to the database
+
+        Args:
+            dsn (str): libpq connection string, default "" which uses the settings from the secrets file
+            max_connections (int): the maximum number of connections in the pool, default DB_MAX_CONNECTIONS
+        """
+        self.dsn = dsn if len(dsn) > 0 else _default_dsn()
+        key = (self.dsn, os.getpid())
+        if key not in DBConnector._pools:
+            DBConnector._pools[key] = ThreadedConnectionPool(1, max_connections, self.dsn)
+        self.pool = DBConnector._pools[key]
 
-    def _select(self, sql):
+    @classmethod
+    def close_all(cls) -> None:
+        """Close all pooled connections of this process"""
+        for key in [key for key in cls._pools.keys() if key[1] == os.getpid()]:
+            cls._pools.pop(key).closeall()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection from the pool, the transaction is committed if no error occurs
+        and the connection is returned to the pool afterwards"""
+        conn = self.pool.getconn()
         try:
-            cur = self.conn.cursor()
-            cur.execute(sql)
-            result = cur.fetchall()        
-            cur.close()
-            return result
-        except (Exception, psycopg2.Error) as error:
-            print(f"Got database error; {error}") 
-
-    def get_dijktrajecten(self) -> dict:
-        result = {}
-        rows = self._select("select geom, subsect_id, naam from rwk_areaal_2024")
-
-        for row in rows:
-            id = row[1]
-            naam = row[2]
-
-            pts = []
-            if type(row[0]) == MultiLineString:
-                for ls in row[0]:
-                    pts += [p for p in ls.coords]
-            elif type(row[0]) == LineString:
-                pts = [p for p in ls.coords]
-
-            # get coords (in WGS84)
-            pts = [PointRD(lon=p[0], lat=p[1]) for p in pts]
-            # apply conversion to add RD coords
-            for p in pts: p.to_rd()
-            # add chainage to point
-            chainage = 0
-            for i, p in enumerate(pts):
-                if i>0:
-                    dx = pts[i].x - pts[i-1].x
-                    dy = pts[i].y - pts[i-1].y
-                    chainage += math.sqrt(dx**2 + dy**2)
-                    p.chainage = int(chainage)
-            # remove point with same chainage
-            final_pts, chainages = [], []
-            for p in pts:
-                if not p.chainage in chainages:
-                    final_pts.append(p)
-                    chainages.append(p.chainage)   
-                                        
-            result[row[1]] = DijkTraject(
-                    id = row[1],
-                    naam = row[2],
-                    referentielijn = final_pts
-                )
+            yield conn
+            conn.commit()
+        except BaseException: # also on GeneratorExit if a stream is not fully read
+            conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
 
-        return result
+    def _stream(self, query, params=None, batch_size: int = DB_BATCH_SIZE) -> Iterator[tuple]:
+        """Execute the query using a server side cursor and yield the rows, only batch_size rows
+        are kept in memory at the same time
+
+        Args:
+            query: the query
+            params: the query parameters, default None
+            batch_size (int): the number of rows to fetch per roundtrip, default DB_BATCH_SIZE
+
+        Returns:
+            Iterator[tuple]: the rows
+        """
+        with self.connection() as conn:
+            with conn.cursor(name=f"geoprofielen_{uuid.uuid4().hex}") as cur:
+                cur.execute(query, params)
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if len(rows) == 0:
+                        break
+                    for row in rows:
+                        yield row
 
+    def get_dijktrajecten(self, table: str = DIJKTRAJECTEN_TABLE, selection: DijkTrajectSelection = None) -> dict:
+        """Get the dijktrajecten from the database, the geometries are fetched as 2D WKB 
+        and the rows are streamed in batches
 
-    
\ No newline at end of file
+        Args:
+            table (str): the name of the table with the dijktrajecten, default DIJKTRAJECTEN_TABLE
+            selection (DijkTrajectSelection): only get the selected dijktrajecten, default None (all dijktrajecten)
+
+        Returns:
+            dict: the dijktrajecten with the subsect_id as key
+        """
+        where, params = ("", []) if selection is None else selection.to_sql()
+
+        result = {}
+        query = sql.SQL("select ST_AsBinary(ST_Force2D(geom)), subsect_id, naam from {}" + where).format(sql.Identifier(*table.split(".")))
+        for row in self._stream(query, params):
+            result[row[1]] = _dijktraject_from_row(row[0], row[1], row[2])
+
+        return result
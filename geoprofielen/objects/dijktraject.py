@@ -8,18 +8,27 @@ __email__ = "breinbaasnl@gmail.com"
 __status__ = "Development"
 
 from pydantic import BaseModel
-from typing import List
+from typing import List, Tuple
+import numpy as np
 from shapely.geometry import Polygon, Point
+from shapely.prepared import prep, PreparedGeometry
+try:
+    from shapely import contains_xy # shapely >= 2.0
+except ImportError:
+    from shapely.vectorized import contains as contains_xy
 
 from .pointrd import PointRD
+from .referenceline import ReferenceLine
 
 class DijkTraject(BaseModel):
     class Config:
         arbitrary_types_allowed = True
 
+    __slots__ = ("_prepared_polygon",) # cache for the prepared soilinvestigation polygon
+
     id: str = ""
     naam: str = ""
-    referentielijn: List[PointRD] = []
+    referentielijn: ReferenceLine = ReferenceLine()
 
     # you can assign a shapely polygon to the dijktraject which 
     # will limit the area where soilinvestigations can be found.
@@ -27,42 +36,88 @@ class DijkTraject(BaseModel):
     
     @property
     def chainage_min(self) -> int:
-        if len(self.referentielijn) > 0:
-            return self.referentielijn[0].chainage
-        else:
-            return 0
+        return self.referentielijn.chainage_min
 
     @property
     def chainage_max(self) -> int:
-        if len(self.referentielijn) > 0:
-            return self.referentielijn[-1].chainage
-        else:
-            return 0
+        return self.referentielijn.chainage_max
 
     def has_soilinvestigation_polygon(self) -> bool:
         return len(self.soilinvestigation_polygon) > 0
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name == "soilinvestigation_polygon":
+            object.__setattr__(self, "_prepared_polygon", None)
+
+    def _soilinvestigation_geometry(self) -> PreparedGeometry:
+        """Return the prepared shapely polygon of the soilinvestigation polygon, the polygon is 
+        created on the first call and reset if a new soilinvestigation_polygon is assigned
+
+        Args:
+            None
+
+        Returns:
+            PreparedGeometry: the prepared polygon
+        """
+        prepared = getattr(self, "_prepared_polygon", None)
+        if prepared is None:
+            prepared = prep(Polygon(self.soilinvestigation_polygon))
+            object.__setattr__(self, "_prepared_polygon", prepared)
+        return prepared
+
     def point_in_soilinvestigation_polygon(self, x: float, y: float) -> bool:
         if self.has_soilinvestigation_polygon():        
-            p = Point(x, y)
-            pg = Polygon(self.soilinvestigation_polygon) 
-            return p.within(pg)
+            return self._soilinvestigation_geometry().contains(Point(x, y))
         else:
             return True
 
+    def points_in_soilinvestigation_polygon(self, x: np.array, y: np.array) -> np.array:
+        """Check for all given points if they are inside the soilinvestigation polygon, points
+        on the boundary of the polygon are not inside the polygon
+
+        Args:
+            x (np.array): x coordinates
+            y (np.array): y coordinates
+
+        Returns:
+            np.array: boolean array, True if the point is inside the polygon (or if there is no polygon)
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if self.has_soilinvestigation_polygon():
+            return np.asarray(contains_xy(self._soilinvestigation_geometry().context, x, y), dtype=bool)
+        else:
+            return np.ones(x.shape, dtype=bool)
+
     def chainage_to_xy(self, chainage: int) -> PointRD:
         if chainage < self.chainage_min or chainage > self.chainage_max:
             raise ValueError(f"Invalid chainage {chainage}, limits are [{self.chainage_min},{self.chainage_max}]")
 
-        for i in range(1,len(self.referentielijn)):
-            p1 = self.referentielijn[i-1]
-            p2 = self.referentielijn[i]
-            if p1.chainage <= chainage and chainage <= p2.chainage:
-                dl = chainage - p1.chainage
-                x = p1.x + dl / (p2.chainage - p1.chainage) * (p2.x - p1.x)
-                y = p1.y + dl / (p2.chainage - p1.chainage) * (p2.y - p1.y)
-                point = PointRD(chainage=chainage, x=x, y=y)
-                point.to_wgs84() # fill in the blanks
-                return point
-        
-    
\ No newline at end of file
+        x, y = self.referentielijn.interpolate([chainage])
+        point = PointRD(chainage=chainage, x=x[0], y=y[0])
+        point.to_wgs84() # fill in the blanks
+        return point
+
+    def chainages_to_xy(self, chainages: np.array, wgs84: bool = False) -> Tuple[np.array, ...]:
+        """Convert an array of chainages to RD coordinates, this gives the same
+        coordinates as chainage_to_xy but for all chainages at once
+
+        Args:
+            chainages (np.array): the chainages
+            wgs84 (bool): also return the WGS84 coordinates, default False
+
+        Returns:
+            Tuple[np.array, ...]: x and y (and lat and lon if wgs84 is True) arrays
+        """
+        chainages = np.asarray(chainages, dtype=float)
+        if np.any(chainages < self.chainage_min) or np.any(chainages > self.chainage_max):
+            raise ValueError(f"Invalid chainage(s) found, limits are [{self.chainage_min},{self.chainage_max}]")
+
+        x, y = self.referentielijn.interpolate(chainages)
+
+        if not wgs84:
+            return x, y
+
+        lat, lon = PointRD._coordconvertor.from_rd_array(x, y)
+        return x, y, lat, lon
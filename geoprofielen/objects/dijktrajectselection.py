@@ -0,0 +1,100 @@
+__author__ = "Breinbaas | Rob van Putten"
+__copyright__ = "Copyright 2020"
+__credits__ = ["Rob van Putten"]
+__license__ = "GPL"
+__version__ = "0.1.0"
+__maintainer__ = "Rob van Putten"
+__email__ = "breinbaasnl@gmail.com"
+__status__ = "Development"
+
+import re
+from pydantic import BaseModel
+from typing import List, Tuple
+from shapely.geometry import Polygon, LineString, Point, box
+
+from .dijktraject import DijkTraject
+
+RD_SRID = 28992
+WGS84_SRID = 4326 # the dijktrajecten in the database are stored in WGS84
+
+def _like_to_regex(pattern: str) -> re.Pattern:
+    # translate a SQL (I)LIKE pattern, % = any number of characters, _ = one character
+    return re.compile("".join([".*" if c == "%" else "." if c == "_" else re.escape(c) for c in pattern]), re.IGNORECASE | re.DOTALL)
+
+class DijkTrajectSelection(BaseModel):
+    """Selection of dijktrajecten, all given criteria need to be met (an empty selection selects everything)
+
+    The selection can be translated to a SQL where clause so only the selected dijktrajecten
+    are fetched from the database or it can be used to filter dijktrajecten that are already
+    available (like from the snapshot).
+    """
+    ids: List[str] = [] # subsect_id's, like ['118A1', '118B1']
+    name_patterns: List[str] = [] # case insensitive patterns for the name in SQL LIKE format, like ['Lopiker%']
+    bbox: List[float] = [] # RD bounding box as [xmin, ymin, xmax, ymax]
+    polygon: List = [] # RD polygon as [(x1,y1),(x2,y2)...(xn,yn)]
+
+    def is_empty(self) -> bool:
+        return len(self.ids) + len(self.name_patterns) + len(self.bbox) + len(self.polygon) == 0
+
+    def _bbox_geometry(self) -> Polygon:
+        if len(self.bbox) != 4:
+            raise ValueError(f"The bounding box should be given as [xmin, ymin, xmax, ymax], got {self.bbox}")
+        return box(*self.bbox)
+
+    def to_sql(self) -> Tuple[str, list]:
+        """Get the where clause for the selection with placeholders for the parameters
+
+        Args:
+            None
+
+        Returns:
+            Tuple[str, list]: the where clause (empty if nothing is selected) and the parameters
+        """
+        conditions, params = [], []
+        if len(self.ids) > 0:
+            conditions.append("subsect_id = ANY(%s)")
+            params.append(list(self.ids))
+        if len(self.name_patterns) > 0:
+            conditions.append("naam ILIKE ANY(%s)")
+            params.append(list(self.name_patterns))
+        # the geometry in the database is in WGS84 so transform the (constant) RD geometry
+        # once instead of the geometry of every record, this way the spatial index can be used
+        if len(self.bbox) > 0:
+            self._bbox_geometry() # validate
+            conditions.append(f"ST_Intersects(geom, ST_Transform(ST_MakeEnvelope(%s, %s, %s, %s, {RD_SRID}), {WGS84_SRID}))")
+            params += [float(v) for v in self.bbox]
+        if len(self.polygon) > 0:
+            conditions.append(f"ST_Intersects(geom, ST_Transform(ST_GeomFromText(%s, {RD_SRID}), {WGS84_SRID}))")
+            params.append(Polygon(self.polygon).wkt)
+
+        if len(conditions) == 0:
+            return "", []
+        return " where " + " and ".join(conditions), params
+
+    def matches(self, dijktraject: DijkTraject) -> bool:
+        """Check if the dijktraject is part of the selection, note that the spatial checks
+        use the RD coordinates so results can differ slightly from the database query for
+        dijktrajecten that are close to the edges of the bounding box or polygon
+
+        Args:
+            dijktraject (DijkTraject): the dijktraject to check
+
+        Returns:
+            bool: True if the dijktraject is selected
+        """
+        if len(self.ids) > 0 and not dijktraject.id in self.ids:
+            return False
+        if len(self.name_patterns) > 0 and not any([_like_to_regex(p).fullmatch(dijktraject.naam) for p in self.name_patterns]):
+            return False
+
+        if len(self.bbox) > 0 or len(self.polygon) > 0:
+            rl = dijktraject.referentielijn
+            if len(rl) == 0:
+                return False
+            line = LineString(zip(rl.x, rl.y)) if len(rl) > 1 else Point(rl.x[0], rl.y[0])
+            if len(self.bbox) > 0 and not self._bbox_geometry().intersects(line):
+                return False
+            if len(self.polygon) > 0 and not Polygon(self.polygon).intersects(line):
+                return False
+
+        return True
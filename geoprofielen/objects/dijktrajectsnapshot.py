@@ -0,0 +1,148 @@
+__author__ = "Breinbaas | Rob van Putten"
+__copyright__ = "Copyright 2020"
+__credits__ = ["Rob van Putten"]
+__license__ = "GPL"
+__version__ = "0.1.0"
+__maintainer__ = "Rob van Putten"
+__email__ = "breinbaasnl@gmail.com"
+__status__ = "Development"
+
+import os
+import json
+import time
+import numpy as np
+from pathlib import Path
+from typing import Dict
+
+from .dijktraject import DijkTraject
+from .referenceline import ReferenceLine
+from .dijktrajectselection import DijkTrajectSelection
+from ..settings import DIJKTRAJECTEN_TABLE, DIJKTRAJECTEN_SNAPSHOT_FILE, DIJKTRAJECTEN_SNAPSHOT_MAX_AGE
+
+# increase this number if the processing of the dijktrajecten (like the
+# chainage calculation) changes so all snapshots will be invalidated
+DIJKTRAJECT_SNAPSHOT_VERSION = 2
+
+class DijkTrajectSnapshot():
+    """Local copy of the processed dijktrajecten from the database
+
+    All referencelines are stored as concatenated arrays in one npz file together
+    with a key with the snapshot version, the database table and the creation time.
+    If the version or table differ or the snapshot is older than max_age days the
+    snapshot is invalid and will be ignored.
+    """
+    def __init__(self, filename: str = DIJKTRAJECTEN_SNAPSHOT_FILE, max_age: float = DIJKTRAJECTEN_SNAPSHOT_MAX_AGE):
+        self.filename = filename
+        self.max_age = max_age
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.filename) > 0
+
+    def _is_fresh(self, key: dict, table: str) -> bool:
+        if key.get("version") != DIJKTRAJECT_SNAPSHOT_VERSION or key.get("table") != table:
+            return False
+        if self.max_age > 0 and time.time() - key.get("created", 0) > self.max_age * 24 * 3600:
+            return False
+        return True
+
+    def load(self, table: str = DIJKTRAJECTEN_TABLE) -> Dict[str, DijkTraject]:
+        """Get the dijktrajecten from the snapshot
+
+        Args:
+            table (str): the database table the dijktrajecten should come from, default DIJKTRAJECTEN_TABLE
+
+        Returns:
+            Dict[str, DijkTraject]: the dijktrajecten with the id as key or None if there is no valid snapshot
+        """
+        if not self.enabled or not os.path.isfile(self.filename):
+            return None
+
+        try:
+            with np.load(self.filename, allow_pickle=False) as data:
+                if not self._is_fresh(json.loads(str(data["key"])), table):
+                    return None
+
+                offsets = data["offsets"]
+                arrays = {name: data[name] for name in ["chainage", "x", "y", "lat", "lon"]}
+                result = {}
+                for i, (id, naam) in enumerate(zip(data["ids"], data["names"])):
+                    s = slice(offsets[i], offsets[i+1])
+                    result[str(id)] = DijkTraject(
+                        id = str(id),
+                        naam = str(naam),
+                        referentielijn = ReferenceLine(**{name: a[s] for name, a in arrays.items()})
+                    )
+                return result
+        except Exception:
+            pass # invalid or incompatible snapshot, will be overwritten on the next save
+
+        return None
+
+    def save(self, dijktrajecten: Dict[str, DijkTraject], table: str = DIJKTRAJECTEN_TABLE) -> None:
+        """Store the dijktrajecten in the snapshot
+
+        Args:
+            dijktrajecten (Dict[str, DijkTraject]): the dijktrajecten with the id as key
+            table (str): the database table the dijktrajecten come from, default DIJKTRAJECTEN_TABLE
+
+        Returns:
+            None
+        """
+        if not self.enabled:
+            return
+
+        referencelines = [dt.referentielijn for dt in dijktrajecten.values()]
+        arrays = {
+            name: np.concatenate([getattr(rl, name) for rl in referencelines] + [np.empty(0, dtype=dtype)])
+            for name, dtype in [("chainage", np.int64), ("x", float), ("y", float), ("lat", float), ("lon", float)]
+        }
+        key = {"version": DIJKTRAJECT_SNAPSHOT_VERSION, "table": table, "created": time.time()}
+
+        p = Path(self.filename)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file first so other processes will never read a half written file
+        tmpfile = p.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmpfile, "wb") as f:
+            np.savez(
+                f,
+                key = np.array(json.dumps(key)),
+                ids = np.array([str(k) for k in dijktrajecten.keys()], dtype=str),
+                names = np.array([dt.naam for dt in dijktrajecten.values()], dtype=str),
+                offsets = np.concatenate(([0], np.cumsum([len(rl) for rl in referencelines], dtype=np.int64))),
+                **arrays
+            )
+        os.replace(tmpfile, p)
+
+
+def get_dijktrajecten(snapshot_file: str = DIJKTRAJECTEN_SNAPSHOT_FILE, table: str = DIJKTRAJECTEN_TABLE, refresh: bool = False, selection: DijkTrajectSelection = None, max_age: float = DIJKTRAJECTEN_SNAPSHOT_MAX_AGE) -> Dict[str, DijkTraject]:
+    """Get the dijktrajecten from the local snapshot if it is valid, else get them from the
+    database and update the snapshot (only if all dijktrajecten are selected)
+
+    Args:
+        snapshot_file (str): the snapshot file, default DIJKTRAJECTEN_SNAPSHOT_FILE (empty = no snapshot)
+        table (str): the database table with the dijktrajecten, default DIJKTRAJECTEN_TABLE
+        refresh (bool): ignore the snapshot and always use the database, default False
+        selection (DijkTrajectSelection): only get the selected dijktrajecten, default None (all dijktrajecten)
+        max_age (float): maximum age of the snapshot in days, default DIJKTRAJECTEN_SNAPSHOT_MAX_AGE (0 = always valid)
+
+    Returns:
+        Dict[str, DijkTraject]: the dijktrajecten with the id as key
+    """
+    if selection is not None and selection.is_empty():
+        selection = None
+
+    snapshot = DijkTrajectSnapshot(snapshot_file, max_age)
+    if not refresh:
+        result = snapshot.load(table)
+        if result is not None:
+            if selection is not None:
+                result = {k:v for k,v in result.items() if selection.matches(v)}
+            return result
+
+    # only import the database code if we need it so we can run without the database drivers
+    from .dbconnector import DBConnector
+    result = DBConnector().get_dijktrajecten(table=table, selection=selection)
+    if selection is None: # never store a partial snapshot
+        snapshot.save(result, table)
+    return result
@@ -0,0 +1,111 @@
+__author__ = "Breinbaas | Rob van Putten"
+__copyright__ = "Copyright 2020"
+__credits__ = ["Rob van Putten"]
+__license__ = "GPL"
+__version__ = "0.1.0"
+__maintainer__ = "Rob van Putten"
+__email__ = "breinbaasnl@gmail.com"
+__status__ = "Development"
+
+import os
+import pickle
+import hashlib
+from pathlib import Path
+from typing import Any
+
+from ..settings import GEF_CACHE_PATH, DEFAULT_MINIMUM_LAYERHEIGHT, BOREHOLE_CODES
+
+# increase this number if the parsing of GEF files changes
+# so all cached files will be invalidated
+GEF_PARSER_VERSION = 2
+# increase this number if the conversion of cpts or boreholes to soillayers 
+# changes so all cached converted objects will be invalidated
+GEF_CONVERSION_VERSION = 1
+
+def conversion_tag(tag: str) -> str:
+    """Get the tag for a cached converted object, the tag contains the conversion 
+    version and a hash of the settings used by the conversion so changes in the 
+    conversion or the settings invalidate the cached objects
+
+    Args:
+        tag (str): tag to identify the type of object (like CPT_NEN_5104)
+
+    Returns:
+        str: the tag including the conversion version and settings
+    """
+    settings = repr((DEFAULT_MINIMUM_LAYERHEIGHT, BOREHOLE_CODES)).encode("utf-8")
+    return f"{tag}_v{GEF_CONVERSION_VERSION}_{hashlib.sha1(settings).hexdigest()[:12]}"
+
+class GEFCache():
+    """Binary cache for parsed (and optionally converted) GEF files
+
+    Every cached object is stored in its own pickle file together with the path,
+    modification time and size of the original file and the parser version. If
+    any of those changes the cached object is invalid and will be ignored.
+    """
+    def __init__(self, cache_path: str = GEF_CACHE_PATH):
+        self.cache_path = cache_path
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.cache_path) > 0
+
+    def _stamp(self, filename: str, tag: str) -> tuple:
+        stat = os.stat(filename)
+        return (str(Path(filename).absolute()), stat.st_mtime_ns, stat.st_size, GEF_PARSER_VERSION, tag)
+
+    def _cachefile(self, filename: str, tag: str) -> Path:
+        key = f"{Path(filename).absolute()}|{tag}".encode("utf-8")
+        return Path(self.cache_path) / f"{hashlib.sha1(key).hexdigest()}.pkl"
+
+    def load(self, filename: str, tag: str = "") -> Any:
+        """Get the cached object for the given file
+
+        Args:
+            filename (str): the name of the original file
+            tag (str): tag to identify the type of object (like CPT or Borehole), default ""
+
+        Returns:
+            Any: the cached object or None if there is no valid cached object
+        """
+        if not self.enabled:
+            return None
+
+        cachefile = self._cachefile(filename, tag)
+        if not cachefile.is_file():
+            return None
+
+        try:
+            with open(cachefile, "rb") as f:
+                stamp, obj = pickle.load(f)
+            if stamp == self._stamp(filename, tag):
+                return obj
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError, AttributeError, ImportError):
+            pass # unreadable or incompatible cache file, will be overwritten on the next save
+
+        return None
+
+    def save(self, filename: str, obj: Any, tag: str = "") -> None:
+        """Store the object for the given file in the cache
+
+        Args:
+            filename (str): the name of the original file
+            obj (Any): the object to store
+            tag (str): tag to identify the type of object (like CPT or Borehole), default ""
+
+        Returns:
+            None
+        """
+        if not self.enabled:
+            return
+
+        try:
+            cachefile = self._cachefile(filename, tag)
+            cachefile.parent.mkdir(parents=True, exist_ok=True)
+            # write to a temporary file first so other processes will never read a half written file
+            tmpfile = cachefile.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmpfile, "wb") as f:
+                pickle.dump((self._stamp(filename, tag), obj), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpfile, cachefile)
+        except OSError:
+            pass # the cache should never break reading the actual files
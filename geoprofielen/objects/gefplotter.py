@@ -0,0 +1,89 @@
+__author__ = "Breinbaas | Rob van Putten"
+__copyright__ = "Copyright 2020"
+__credits__ = ["Rob van Putten"]
+__license__ = "GPL"
+__version__ = "0.1.0"
+__maintainer__ = "Rob van Putten"
+__email__ = "breinbaasnl@gmail.com"
+__status__ = "Development"
+
+import os
+import multiprocessing
+from pathlib import Path
+from typing import List, Tuple, Iterator
+from concurrent.futures import ProcessPoolExecutor
+
+from .cpt import CPT
+from .borehole import Borehole
+
+GEF_PLOT_TYPES = {"CPT": CPT, "Borehole": Borehole}
+
+def _init_plot_worker() -> None:
+    """Initialize a worker process for plot_gef_files, the workers only plot to files
+    so they do not need an interactive backend"""
+    import matplotlib
+    matplotlib.use("Agg")
+
+def _plot_gef_file(args: Tuple[str, str, str]) -> Tuple[float, float, str, str]:
+    """Read, convert and plot one gef file, this is a module level function so it can be used in a process pool
+
+    The parsed object is plotted in the same process so it is never parsed twice or
+    copied between processes, only the coordinates are returned.
+
+    Args:
+        args (Tuple[str, str, str]): the gef file, the type of gef file (see GEF_PLOT_TYPES) and the path for the plot
+
+    Returns:
+        Tuple[float, float, str, str]: the x and y coordinate, the read error and the conversion or plot error
+    """
+    filename, gef_type, plot_path = args
+    try:
+        obj = GEF_PLOT_TYPES[gef_type].from_file(filename)
+    except Exception as e:
+        return None, None, f"{e}", ""
+
+    try:
+        obj.convert()
+        obj.plot(filepath=plot_path, filename=f"{Path(filename).stem}.png")
+        return obj.x, obj.y, "", ""
+    except Exception as e:
+        return obj.x, obj.y, "", f"{e}"
+
+def plot_gef_files(files: List[str], gef_type: str, plot_path: str, num_workers: int = 0) -> Iterator[Tuple[str, float, float, str, str]]:
+    """Read, convert and plot the given gef files using num_workers processes with the Agg
+    backend. The plots are written as <plot_path>/<stem of the gef file>.png and the results
+    are returned in the order of the files so the output is the same as a serial run.
+
+    Args:
+        files (List[str]): the gef files
+        gef_type (str): the type of the gef files, CPT or Borehole
+        plot_path (str): the path for the plots
+        num_workers (int): number of processes, default 0 (use all cpus), 1 = plot in this process
+
+    Returns:
+        Iterator[Tuple[str, float, float, str, str]]: the filename, the x and y coordinate, the read error and the conversion or plot error per file
+    """
+    if not gef_type in GEF_PLOT_TYPES:
+        raise ValueError(f"Unknown gef type '{gef_type}', options are {list(GEF_PLOT_TYPES.keys())}")
+
+    files = [str(f) for f in files]
+    tasks = [(f, gef_type, plot_path) for f in files]
+
+    num_workers = num_workers if num_workers > 0 else os.cpu_count()
+    num_workers = min(num_workers, len(tasks))
+    if num_workers <= 1:
+        results = map(_plot_gef_file, tasks)
+        executor = None
+    else:
+        # prefer fork so the workers start fast and do not import the calling script again
+        mp_context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        executor = ProcessPoolExecutor(max_workers=num_workers, mp_context=mp_context, initializer=_init_plot_worker)
+        chunksize = max(1, int(len(tasks) / (num_workers * 4)))
+        results = executor.map(_plot_gef_file, tasks, chunksize=chunksize)
+
+    try:
+        for filename, (x, y, read_error, error) in zip(files, results):
+            yield filename, x, y, read_error, error
+    finally:
+        if executor is not None:
+            executor.shutdown()
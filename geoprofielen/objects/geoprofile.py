@@ -8,21 +8,19 @@ __email__ = "breinbaasnl@gmail.com"
 __status__ = "Development"
 
 from pydantic import BaseModel
-from typing import List
-import numpy as np
+from typing import List, Tuple
 
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
-import matplotlib.patches as patches
 
 from .soilprofile import Soilprofile
-from .pointrd import PointRD
-from ..settings import HDSR_SOIL_COLORS
+from .referenceline import ReferenceLine
+from .plotting import soillayer_collection
 
 class Geoprofile(BaseModel):
     id: str = "" # id van het dijktraject
     name: str = ""  # naam van het dijktraject
-    points: List[PointRD] = [] # referentielijn
+    points: ReferenceLine = ReferenceLine() # referentielijn
     soilprofiles: List[Soilprofile] = [] # gevonden grondprofielen
 
     @property
@@ -61,76 +59,30 @@ class Geoprofile(BaseModel):
                     newsoilprofiles.append(sp)
         self.soilprofiles = newsoilprofiles
 
-    def get_xy_from_l_on_refline(self, l):
-        for i in range(1,len(self.points)):
-            p1 = self.points[i-1]
-            p2 = self.points[i]
-
-            if p1.chainage <= l and l <= p2.chainage:
-                x = p1.x + (l - p1.chainage) / (p2.chainage - p1.chainage) * (p1.x - p2.x)
-                y = p1.y + (l - p1.chainage) / (p2.chainage - p1.chainage) * (p1.y - p2.y)
-                return x, y
-
-        raise ValueError(f"Could not find xy for chainage {l}; min chainage = {self.points[0].chainage}, max chainage = {self.points[-1].chainage}")
-    
-    
-    def get_partial_refline(self, chainage_start: int, chainage_end: int):
-        result = []
-        points = np.linspace(chainage_start, chainage_end, int((chainage_end - chainage_start) / 10.) + 1)
-        for p in points:
-            result.append(self.get_xy_from_l_on_refline(p))
-
-        return result
-
-    
-    def to_dam_input(self, segmentid: int, shapeinput) -> int:
-        #p = Path(filepath) / self.id
-        #p.mkdir(parents=True, exist_ok=True)
-        #fsegments = open(p / "segments.csv", 'w')
-        #fsoilprofiles = open(p / "soilprofiles.csv", 'w')        
-        
-        lines_segments = []
-        lines_soilprofiles = []
-        for i, soilprofile in enumerate(self.soilprofiles):            
-            id = f"profiel_{segmentid+i+1}"
-            lines_segments.append(f"{segmentid+i+1},{id},100,Stability\n")
-            lines_segments.append(f"{segmentid+i+1},{id},100,Piping\n")
-            #fsegments.write(f"{segmentid+i+1},{id},100,Stability\n")
-            #fsegments.write(f"{segmentid+i+1},{id},100,Piping\n")
-            for soillayer in soilprofile.soillayers:
-                #fsoilprofiles.write(f"{id},{soillayer.z_top:.02f},{soillayer.soilcode}\n")  
-                lines_soilprofiles.append(f"{id},{soillayer.z_top:.02f},{soillayer.soilcode}\n")
-            # store points and segmentid
-            shapeinput.append((f"{segmentid+i+1}", self.get_partial_refline(soilprofile.x_left, soilprofile.x_right)) )
-        
-        #fsegments.close()
-        #fsoilprofiles.close()
-        # yeah I know.. ugly but it is a fast fix to write everything to one file.. sorry ;-)
-        return lines_segments, lines_soilprofiles, segmentid + len(self.soilprofiles), shapeinput
+    def get_partial_refline(self, chainage_start: int, chainage_end: int) -> List[Tuple[float, float]]:
+        """Get the x,y coordinates of the referenceline between the given chainages (every 10m and all points of the referenceline in between)"""
+        return [(x, y) for x, y in self.points.partial(chainage_start, chainage_end).tolist()]
     
     def plot(self, filename: str) -> None:
         fig = plt.figure(figsize=(20, 10))
         ax = fig.add_subplot()
 
-        for soilprofile in self.soilprofiles:
-            for soillayer in soilprofile.soillayers:
-                soilcolor = HDSR_SOIL_COLORS[soillayer.soilcode]
+        # the bounds are only needed once
+        z_top, z_bottom = self.z_top, self.z_bottom
 
-                ax.add_patch(
-                    patches.Rectangle(
-                        (soilprofile.x_left, soillayer.z_bottom),
-                        soilprofile.width,
-                        soillayer.height,
-                        fill=True,
-                        facecolor=soilcolor,
-                    )   
-                )
+        # all soillayers in one collection
+        layers = [(sp.x_left, sp.x_right, sl.z_top, sl.z_bottom, sl.soilcode) for sp in self.soilprofiles for sl in sp.soillayers]
+        if len(layers) > 0:
+            x_left, x_right, z_tops, z_bottoms, soilcodes = zip(*layers)
+            ax.add_collection(soillayer_collection(x_left, x_right, z_tops, z_bottoms, soilcodes), autolim=False)
 
-                ax.text(soilprofile.x_mid, self.z_top + 1.0, soilprofile.source, rotation=90)
-
-        ax.set_xlim(self.points[0].chainage, self.points[-1].chainage)
-        ax.set_ylim(self.z_bottom - 1.0, self.z_top + 5.0)
-        plt.grid(which="both")
-        plt.title(f"{self.name} ({self.id})")
-        plt.savefig(filename)
-        plt.close()
\ No newline at end of file
+        for soilprofile in self.soilprofiles:
+            if len(soilprofile.soillayers) > 0:
+                ax.text(soilprofile.x_mid, z_top + 1.0, soilprofile.source, rotation=90)
+
+        ax.set_xlim(self.points.chainage_min, self.points.chainage_max)
+        ax.set_ylim(z_bottom - 1.0, z_top + 5.0)
+        ax.grid(which="both")
+        ax.set_title(f"{self.name} ({self.id})")
+        fig.savefig(filename) # plt.savefig would draw the figure a second time
+        plt.close(fig)
\ No newline at end of file
@@ -8,11 +8,14 @@ __email__ = "breinbaasnl@gmail.com"
 __status__ = "Development"
 
 from pydantic import BaseModel
-from typing import List
+from typing import List, Tuple, Dict, Iterator
 import os
 import numpy as np
 import math
+import multiprocessing
 from pathlib import Path
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 
 import folium
 
@@ -20,6 +23,8 @@ import folium
 from .dijktraject import DijkTraject
 from .cpt import CPT, ConversionType
 from .borehole import Borehole
+from .gefcache import GEFCache, conversion_tag
+from .spatialindex import SpatialIndex
 from .geoprofile import Geoprofile
 from .pgeoprofile import PGeoprofile
 from .soilprofile import Soilprofile
@@ -28,16 +33,146 @@ from ..helpers import case_insensitive_glob
 from ..settings import DEFAULT_CHAINAGE_STEP, MAX_CPT_DISTANCE, MAX_BOREHOLE_DISTANCE, NUM_PROB_SOILINVESTIGATIONS, HDSR_SOIL_COLORS, MIN_PROBABILISTIC_SOILPROFILE_LENGTH, MIN_PROBABILISTIC_CPT_BOREHOLE_LENGTH
 from ..objects.pointrd import PointRD
 
+def _read_cpt_file(filename: str) -> Tuple[CPT, str]:
+    """Read and convert a cpt file, this is a module level function so it can be used in a process pool
+
+    Args:
+        filename (str): the name of the cpt file
+
+    Returns:
+        Tuple[CPT, str]: the converted cpt (None on errors) and the error message
+    """
+    # the cache stores the converted cpt so we can skip parsing and converting
+    gefcache = GEFCache()
+    cpt = gefcache.load(filename, tag=conversion_tag("CPT_NEN_5104"))
+    if cpt is not None:
+        return cpt, ""
+
+    cpt = CPT()
+    try:
+        cpt.read(filename)
+        cpt.convert(conversion_type=ConversionType.NEN_5104)
+        gefcache.save(filename, cpt, tag=conversion_tag("CPT_NEN_5104"))
+        return cpt, ""
+    except Exception as e:
+        return None, f"[E] error in cpt file {filename}; {e}"
+
+def _read_borehole_file(filename: str) -> Tuple[Borehole, str]:
+    """Read and convert a borehole file, this is a module level function so it can be used in a process pool
+
+    Args:
+        filename (str): the name of the borehole file
+
+    Returns:
+        Tuple[Borehole, str]: the converted borehole (None on errors) and the error message
+    """
+    gefcache = GEFCache()
+    borehole = gefcache.load(filename, tag=conversion_tag("Borehole_converted"))
+    if borehole is not None:
+        return borehole, ""
+
+    borehole = Borehole()
+    try:
+        borehole.read(filename)
+        borehole.convert()
+        gefcache.save(filename, borehole, tag=conversion_tag("Borehole_converted"))
+        return borehole, ""
+    except Exception as e:
+        return None, f"[E] error in borehole file {filename}; {e}"
+
+# the creator of a worker process of execute_all, this is only set (by _init_execute_worker)
+# inside the pool workers and is never used in the calling process
+_worker_creator = None
+
+def _init_execute_worker(creator: "GeoProfileCreator", indexes: Dict) -> None:
+    """Initialize a worker process for execute_all
+
+    With the fork start method the cpts, boreholes and spatial indices are inherited
+    from the parent process (read only, so the memory is shared), with spawn (Windows)
+    they are copied to the worker. If no spatial indices are given the worker will read 
+    the files itself which is fast if the gef cache is enabled.
+
+    Args:
+        creator (GeoProfileCreator): the creator of the calling process
+        indexes (Dict): the spatial indices of the cpts and boreholes of the creator
+
+    Returns:
+        None
+    """
+    global _worker_creator
+    import matplotlib
+    matplotlib.use("Agg") # workers only plot to files
+    _worker_creator = creator
+    _worker_creator.num_workers = 1 # no nested process pools
+    _worker_creator.auto_refresh = False
+    if len(indexes) > 0:
+        object.__setattr__(_worker_creator, "_indexes", indexes)
+    else:
+        _worker_creator.refresh()
+
+def _execute_dijktraject(args: Tuple[DijkTraject, str, str], creator: "GeoProfileCreator" = None) -> Tuple[Geoprofile, List[str], str]:
+    """Create the geoprofile for one dijktraject, this is a module level function so it can be used in a process pool
+
+    Args:
+        args (Tuple[DijkTraject, str, str]): the dijktraject, the filename for the plot ("" = no plot) and the path for the map ("" = no map)
+        creator (GeoProfileCreator): the creator to use, default None (use the creator of the worker process)
+
+    Returns:
+        Tuple[Geoprofile, List[str], str]: the geoprofile (None on errors), the log lines and the error message
+    """
+    dijktraject, plot_filename, plot_map_path = args
+    creator = creator if creator is not None else _worker_creator
+    creator.dijktraject = dijktraject
+    numlog = len(creator._log)
+    try:
+        geoprofile, error = creator.execute(plot_map_path=plot_map_path), ""
+        if len(plot_filename) > 0 and len(geoprofile.soilprofiles) > 0:
+            geoprofile.plot(plot_filename)
+    except Exception as e:
+        geoprofile, error = None, f"{e}"
+
+    # hand the log lines over to the calling process
+    log = creator._log[numlog:]
+    del creator._log[numlog:]
+    return geoprofile, log, error
+
 class GeoProfileCreator(BaseModel):    
     cpt_path: str
     borehole_path: str    
     dijktraject: DijkTraject = None
 
-    _cpts: List[CPT] = []
-    _boreholes: List[Borehole] = []
-    _log: List[str] = []
-    _plog: List[str] = [] # logfile for probabilistic approach
-    is_dirty: bool = True
+    # caches per instance, these are not pydantic fields so they are created in __init__
+    __slots__ = (
+        "_cpts",
+        "_boreholes",
+        "_log",
+        "_plog", # logfile for probabilistic approach
+        "_cpt_files", # filename -> ((mtime, size), cpt or None if invalid)
+        "_borehole_files", # filename -> ((mtime, size), borehole or None if invalid)
+        "_indexes", # spatial indices of the cpts and boreholes
+    )
+
+    is_dirty: bool = True # if True the files will be refreshed on the next execute
+    auto_refresh: bool = False # if True check for new, changed or removed files on every execute
+    num_workers: int = 1 # number of processes used to read the gef files and in execute_all, 0 = use all cpus
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        for name in ["_cpts", "_boreholes", "_log", "_plog"]:
+            object.__setattr__(self, name, [])
+        for name in ["_cpt_files", "_borehole_files", "_indexes"]:
+            object.__setattr__(self, name, {})
+
+    # pydantic only pickles the fields, add the caches so spawned workers get the data
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        state["__slots_values__"] = {name: getattr(self, name) for name in self.__slots__}
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        super().__setstate__(state)
+        for name, value in state["__slots_values__"].items():
+            object.__setattr__(self, name, value)
 
     @property
     def plog(self) -> List[str]:
@@ -47,37 +182,93 @@ class GeoProfileCreator(BaseModel):
     def log(self) -> List[str]:
         return self._log
 
-    def _read_cpts(self) -> None:
-        files = case_insensitive_glob(self.cpt_path, ".gef")
-        self._log.append(f"[i] Reading {len(files)} cpt files...")
-
+    def _map(self, func, files: List[str]) -> List:
+        """Apply func to all files, in parallel if num_workers is not 1. The
+        order of the results is always the same as the order of the files
+
+        Args:
+            func: the (module level) function to apply
+            files (List[str]): list of files
+
+        Returns:
+            List: the results in the same order as the files
+        """
+        num_workers = self.num_workers if self.num_workers > 0 else os.cpu_count()
+        if num_workers == 1 or len(files) < 2:
+            return [func(f) for f in files]
+
+        chunksize = max(1, int(len(files) / (num_workers * 4)))
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            return list(executor.map(func, files, chunksize=chunksize))
+
+    def _refresh_files(self, path: str, files_state: Dict, read_func, collection: List, name: str) -> None:
+        """Bring the collection up to date with the gef files in the given path. Only 
+        new or changed files (based on modification time and size) are read and
+        removed files are dropped from the collection.
+
+        Args:
+            path (str): the path with the gef files
+            files_state (Dict): the state per file, filename -> ((mtime, size), object or None if invalid)
+            read_func: the (module level) function to read one file
+            collection (List): the list of valid objects that will be updated
+            name (str): name of the type of file for the log
+
+        Returns:
+            None
+        """
+        files = [str(f) for f in case_insensitive_glob(path, ".gef")]
+        stamps = {}
         for f in files:
-            cpt = CPT()
-            try:
-                cpt.read(f)
-                cpt.convert(conversion_type=ConversionType.NEN_5104)
-                self._cpts.append(cpt)
-            except Exception as e:
-                self._log.append(f"[E] error in cpt file {f}; {e}")
+            stat = os.stat(f)
+            stamps[f] = (stat.st_mtime_ns, stat.st_size)
 
-        self._log.append(f"[i] Found {len(self._cpts)} valid CPTs.")
+        removed = [f for f in files_state.keys() if not f in stamps]
+        changed = [f for f in files if not f in files_state or files_state[f][0] != stamps[f]]
+        self._log.append(f"[i] Found {len(files)} {name} files, reading {len(changed)} new or changed files, removing {len(removed)} files...")
 
+        for f in removed:
+            del files_state[f]
 
-    def _read_boreholes(self) -> None:
-        files = case_insensitive_glob(self.borehole_path, ".gef")
-        self._log.append(f"[i] Reading {len(files)} borehole files...")
+        for f, (obj, error) in zip(changed, self._map(read_func, changed)):
+            files_state[f] = (stamps[f], obj)
+            if obj is None:
+                self._log.append(error)
 
-        for f in files:
-            borehole = Borehole()
-            try:
-                borehole.read(f)
-                borehole.convert()
-                self._boreholes.append(borehole)
-            except Exception as e:
-                self._log.append(f"[E] error in borehole file {f}; {e}")
+        if len(changed) > 0 or len(removed) > 0:
+            collection[:] = [files_state[f][1] for f in files if files_state[f][1] is not None]
 
+    def _read_cpts(self) -> None:
+        self._refresh_files(self.cpt_path, self._cpt_files, _read_cpt_file, self._cpts, "cpt")
+        self._log.append(f"[i] Found {len(self._cpts)} valid CPTs.")
+
+    def _read_boreholes(self) -> None:
+        self._refresh_files(self.borehole_path, self._borehole_files, _read_borehole_file, self._boreholes, "borehole")
         self._log.append(f"[i] Found {len(self._boreholes)} valid boreholes.")
 
+    def refresh(self, full: bool = False) -> None:
+        """Update the cpts and boreholes with the current files in cpt_path and borehole_path,
+        only new or changed files are read and removed files are dropped
+
+        Args:
+            full (bool): forget the current state and read all files, default False
+
+        Returns:
+            None
+        """
+        if full:
+            self._cpt_files.clear()
+            self._borehole_files.clear()
+            self._cpts.clear()
+            self._boreholes.clear()
+
+        self._read_cpts()
+        self._read_boreholes()
+
+        # spatial indices for the nearest cpt / borehole lookup
+        self._indexes["cpt"] = SpatialIndex([cpt.x for cpt in self._cpts], [cpt.y for cpt in self._cpts], MAX_CPT_DISTANCE)
+        self._indexes["borehole"] = SpatialIndex([b.x for b in self._boreholes], [b.y for b in self._boreholes], MAX_BOREHOLE_DISTANCE)
+        self.is_dirty = False
+
     def save_log(self, filename: str) -> None:
         f = open(filename, 'w')
         for l in self._log:
@@ -90,6 +281,50 @@ class GeoProfileCreator(BaseModel):
             f.write(f"{l}\n")
         f.close()
 
+    def execute_all(self, dijktrajecten: Dict[str, DijkTraject], plot_path: str = "", plot_map_path: str = "") -> Iterator[Tuple[str, Geoprofile, str]]:
+        """Create the geoprofiles for all given dijktrajecten using num_workers processes. The
+        results are returned in the order of the dijktrajecten so numbering the segments 
+        afterwards gives the same result as a serial run.
+
+        Args:
+            dijktrajecten (Dict[str, DijkTraject]): the dijktrajecten
+            plot_path (str): path to plot the geoprofiles to (as <key>.png), default "" (no plots)
+            plot_map_path (str): path for the maps of the dijktrajecten (see execute), default ""
+
+        Returns:
+            Iterator[Tuple[str, Geoprofile, str]]: the key, the geoprofile (None on errors) and the error message per dijktraject
+        """
+        # read the files once in this process, the workers will inherit the data
+        if self.is_dirty or self.auto_refresh:
+            self.refresh()
+
+        tasks = [
+            (dijktraject, str(Path(plot_path) / f"{key}.png") if len(plot_path) > 0 else "", plot_map_path) 
+            for key, dijktraject in dijktrajecten.items()
+        ]
+
+        # the serial run sets the dijktraject of this creator, restore it when done
+        dijktraject = self.dijktraject
+        num_workers = self.num_workers if self.num_workers > 0 else os.cpu_count()
+        num_workers = min(num_workers, len(tasks))
+        if num_workers <= 1:
+            results = map(partial(_execute_dijktraject, creator=self), tasks)
+            executor = None
+        else:
+            # prefer fork so the cpts and boreholes do not have to be copied to the workers
+            mp_context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+            executor = ProcessPoolExecutor(max_workers=num_workers, mp_context=mp_context, initializer=_init_execute_worker, initargs=(self, self._indexes))
+            results = executor.map(_execute_dijktraject, tasks)
+
+        try:
+            for key, (geoprofile, log, error) in zip(dijktrajecten.keys(), results):
+                self._log.extend(log)
+                yield key, geoprofile, error
+        finally:
+            self.dijktraject = dijktraject
+            if executor is not None:
+                executor.shutdown()
+
     def execute_prob(self) -> PGeoprofile:
         result = PGeoprofile()
         result.name = self.dijktraject.naam
@@ -98,10 +333,8 @@ class GeoProfileCreator(BaseModel):
         # TODO > geoprofile als aparte class maken en veel van de code daarheen verplaatsen..
         self._plog.append("[i] Reading data...")
 
-        if self.is_dirty:
-            self._read_cpts()
-            self._read_boreholes()
-            self.is_dirty = False
+        if self.is_dirty or self.auto_refresh:
+            self.refresh()
         
         # split in 100m pieces (except for the last which might get a max lenght of 199.99)
         chs = np.arange(self.dijktraject.chainage_min, self.dijktraject.chainage_max, MIN_PROBABILISTIC_SOILPROFILE_LENGTH)
@@ -153,10 +386,8 @@ class GeoProfileCreator(BaseModel):
         # TODO > geoprofile als aparte class maken en veel van de code daarheen verplaatsen..
         self._log.append("[i] Reading data...")
 
-        if self.is_dirty:
-            self._read_cpts()
-            self._read_boreholes()
-            self.is_dirty = False
+        if self.is_dirty or self.auto_refresh:
+            self.refresh()
         
         self._log.append("[i] Matching reference line with available cpts / borehole...")
         
@@ -167,48 +398,26 @@ class GeoProfileCreator(BaseModel):
         if self.dijktraject.chainage_max > chs[-1] + 0.5:
             chs = np.insert(chs, len(chs), self.dijktraject.chainage_max)        
         
+        # midpoints of all intervals
+        lefts, rights = chs[:-1], chs[1:]
+        px, py = self.dijktraject.chainages_to_xy([int((left + right) / 2.) for left, right in zip(lefts, rights)])
+        result.points = self.dijktraject.referentielijn
+
+        # limit the soilinvestigations to the ones in the polygon (if any)
+        cpt_mask, borehole_mask = None, None
+        if self.dijktraject.has_soilinvestigation_polygon():
+            cpt_mask = self.dijktraject.points_in_soilinvestigation_polygon(self._indexes["cpt"].x, self._indexes["cpt"].y)
+            borehole_mask = self.dijktraject.points_in_soilinvestigation_polygon(self._indexes["borehole"].x, self._indexes["borehole"].y)
+
+        # find closest CPT and borehole but always within MAX_CPT_DISTANCE / MAX_BOREHOLE_DISTANCE
+        icpts, _ = self._indexes["cpt"].nearest(px, py, MAX_CPT_DISTANCE, mask=cpt_mask)
+        iboreholes, _ = self._indexes["borehole"].nearest(px, py, MAX_BOREHOLE_DISTANCE, mask=borehole_mask)
+
         # find all soillayers based on CPTs
-        for i in range(0, len(chs)-1):
-            left = chs[i]
-            right = chs[i+1]
-            if right > max(chs):
-                right = max(chs)  
-
-            ch = int((left + right) /  2)
-
-            point = self.dijktraject.chainage_to_xy(int((left + right) / 2.))
-            point.chainage = ch
-            result.points = self.dijktraject.referentielijn
-
-           # find closest CPT but always within MAX_CPT_DISTANCE
-            usecpt, useborehole, dlmin_cpt, dlmin_borehole = None, None, 1e9, 1e9
-            for cpt in self._cpts:                
-                dx = cpt.x - point.x
-                dy = cpt.y - point.y
-                dl = math.sqrt(dx**2 + dy**2)
-                    
-                in_polygon = True 
-                if self.dijktraject.has_soilinvestigation_polygon(): # any polygon to check?
-                    in_polygon = self.dijktraject.point_in_soilinvestigation_polygon(cpt.x, cpt.y)
-                
-                if dl < MAX_CPT_DISTANCE and dl < dlmin_cpt and in_polygon:
-                    dlmin_cpt = dl
-                    usecpt = cpt
-
-            # find closest borehole but always within MAX_BOREHOLE_DISTANCE
-            for borehole in self._boreholes:                
-                dx = borehole.x - point.x
-                dy = borehole.y - point.y
-                dl = math.sqrt(dx**2 + dy**2)
-                    
-                in_polygon = True 
-                if self.dijktraject.has_soilinvestigation_polygon(): # any polygon to check?
-                    in_polygon = self.dijktraject.point_in_soilinvestigation_polygon(borehole.x, borehole.y)
-                
-                if dl < MAX_BOREHOLE_DISTANCE and dl < dlmin_borehole and in_polygon:
-                    dlmin_borehole = dl
-                    useborehole = borehole
-            
+        for left, right, icpt, iborehole in zip(lefts, rights, icpts, iboreholes):
+            usecpt = self._cpts[icpt] if icpt > -1 else None
+            useborehole = self._boreholes[iborehole] if iborehole > -1 else None
+
             if usecpt:
                 if not usecpt.name in [c[-1] for c in cptsforplot]:
                     cptsforplot.append((usecpt.x, usecpt.y, usecpt.filename))
@@ -244,13 +453,10 @@ class GeoProfileCreator(BaseModel):
         result.merge()
 
         if len(plot_map_path)>0:
-            px = []
-            py = []
-            for p in self.dijktraject.referentielijn:
-                px.append(p.lat)
-                py.append(p.lon)
+            px = self.dijktraject.referentielijn.lat
+            py = self.dijktraject.referentielijn.lon
 
-            pmid = (sum(px) / len(px), sum(py) / len(py))
+            pmid = (px.mean(), py.mean())
 
             fmap = folium.Map(location=[pmid[0],pmid[1]], tiles='openstreetmap', zoom_start=17)
             folium.PolyLine(zip(px,py), color="red").add_to(fmap)   
@@ -258,20 +464,18 @@ class GeoProfileCreator(BaseModel):
             # HIER!
             # todo add reference image to polyline   
 
-            for b in boreholesforplot:
-                prd = PointRD(x=b[0], y=b[1])
-                prd.to_wgs84()
+            blat, blon = PointRD._coordconvertor.from_rd_array([b[0] for b in boreholesforplot], [b[1] for b in boreholesforplot])
+            for b, lat, lon in zip(boreholesforplot, blat, blon):
                 filename = str(b[-1]).replace("\\", "/").replace(".gef", ".png")
                 html = f'<img src="file:///{filename}" height=400px />'
-                folium.Marker((prd.lat, prd.lon), icon=folium.Icon(color='blue', icon='info-sign'), popup=html).add_to(fmap)
+                folium.Marker((lat, lon), icon=folium.Icon(color='blue', icon='info-sign'), popup=html).add_to(fmap)
 
 
-            for b in cptsforplot:
-                prd = PointRD(x=b[0], y=b[1])
-                prd.to_wgs84()
-                filename = str(b[-1]).replace("\\", "/").replace(".gef", ".png")
+            clat, clon = PointRD._coordconvertor.from_rd_array([c[0] for c in cptsforplot], [c[1] for c in cptsforplot])
+            for c, lat, lon in zip(cptsforplot, clat, clon):
+                filename = str(c[-1]).replace("\\", "/").replace(".gef", ".png")
                 html = f'<img src="file:///{filename}" height=400px />'
-                folium.Marker((prd.lat, prd.lon), icon=folium.Icon(color='red', icon='info-sign'), popup=html).add_to(fmap)               
+                folium.Marker((lat, lon), icon=folium.Icon(color='red', icon='info-sign'), popup=html).add_to(fmap)               
             
             fmap.save(str(Path(plot_map_path) / self.dijktraject.id) + ".html")
 
@@ -8,15 +8,14 @@ __email__ = "breinbaasnl@gmail.com"
 __status__ = "Development"
 
 from pydantic import BaseModel
-from typing import List
-import numpy as np
+from typing import List, Tuple
 
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
 import matplotlib.patches as patches
 
 from .psoilprofile import PSoilprofile
-from .pointrd import PointRD
+from .referenceline import ReferenceLine
 from ..settings import HDSR_SOIL_COLORS
 
 # same here.. should (with more time) split it in some parent / child relation because
@@ -24,7 +23,7 @@ from ..settings import HDSR_SOIL_COLORS
 class PGeoprofile(BaseModel):
     id: str = "" # id van het dijktraject
     name: str = ""  # naam van het dijktraject
-    points: List[PointRD] = [] # referentielijn
+    points: ReferenceLine = ReferenceLine() # referentielijn
     soilprofiles: List[PSoilprofile] = [] # gevonden grondprofielen
 
     @property
@@ -51,30 +50,9 @@ class PGeoprofile(BaseModel):
             return min([sp.z_bottom for sp in self.soilprofiles])
         raise ValueError("Trying to get zbottom from an empty geoprofile")
 
-    def get_xy_from_l_on_refline(self, l):
-        for i in range(1,len(self.points)):
-            p1 = self.points[i-1]
-            p2 = self.points[i]
-
-            if p1.chainage <= l and l <= p2.chainage:
-                x = p1.x + (l - p1.chainage) / (p2.chainage - p1.chainage) * (p1.x - p2.x)
-                y = p1.y + (l - p1.chainage) / (p2.chainage - p1.chainage) * (p1.y - p2.y)
-                return x, y
-
-        raise ValueError(f"Could not find xy for chainage {l}; min chainage = {self.points[0].chainage}, max chainage = {self.points[-1].chainage}")
-    
-    
-    def get_partial_refline(self, chainage_start: int, chainage_end: int):
-        result = []
-        points = np.linspace(chainage_start, chainage_end, int((chainage_end - chainage_start) / 10.) + 1)
-        for p in points:
-            result.append(self.get_xy_from_l_on_refline(p))
-
-        return result
-
-    
-    def to_dam_input(self, segmentid: int, shapeinput) -> int:
-        pass
+    def get_partial_refline(self, chainage_start: int, chainage_end: int) -> List[Tuple[float, float]]:
+        """Get the x,y coordinates of the referenceline between the given chainages (every 10m and all points of the referenceline in between)"""
+        return [(x, y) for x, y in self.points.partial(chainage_start, chainage_end).tolist()]
     
     def plot(self, filename: str) -> None:
         pass
\ No newline at end of file
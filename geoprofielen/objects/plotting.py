@@ -0,0 +1,41 @@
+__author__ = "Breinbaas | Rob van Putten"
+__copyright__ = "Copyright 2020"
+__credits__ = ["Rob van Putten"]
+__license__ = "GPL"
+__version__ = "0.1.0"
+__maintainer__ = "Rob van Putten"
+__email__ = "breinbaasnl@gmail.com"
+__status__ = "Development"
+
+import numpy as np
+from typing import List
+from matplotlib.collections import PolyCollection
+
+from ..settings import HDSR_SOIL_COLORS
+
+def soillayer_collection(x_left: np.array, x_right: np.array, z_top: np.array, z_bottom: np.array, soilcodes: List[str]) -> PolyCollection:
+    """Create one matplotlib collection with a rectangle per soillayer using the HDSR soil colors, 
+    adding one collection to a plot is a lot faster than adding one patch per soillayer
+
+    Arguments:
+        x_left (np.array): left side of the rectangles
+        x_right (np.array): right side of the rectangles
+        z_top (np.array): top of the rectangles
+        z_bottom (np.array): bottom of the rectangles
+        soilcodes (List[str]): the (HDSR) soilcodes of the soillayers
+
+    Returns:
+        PolyCollection: the collection with the rectangles
+    """
+    z_top = np.asarray(z_top, dtype=float)
+    z_bottom = np.asarray(z_bottom, dtype=float)
+    # x_left and x_right can also be one value for all rectangles
+    x_left = np.broadcast_to(np.asarray(x_left, dtype=float), z_top.shape)
+    x_right = np.broadcast_to(np.asarray(x_right, dtype=float), z_top.shape)
+
+    verts = np.empty((len(z_top), 4, 2))
+    verts[:,0,0], verts[:,0,1] = x_left, z_bottom
+    verts[:,1,0], verts[:,1,1] = x_right, z_bottom
+    verts[:,2,0], verts[:,2,1] = x_right, z_top
+    verts[:,3,0], verts[:,3,1] = x_left, z_top
+    return PolyCollection(verts, facecolors=[HDSR_SOIL_COLORS[soilcode] for soilcode in soilcodes], edgecolors="none")
@@ -0,0 +1,160 @@
+__author__ = "Breinbaas | Rob van Putten"
+__copyright__ = "Copyright 2020"
+__credits__ = ["Rob van Putten"]
+__license__ = "GPL"
+__version__ = "0.1.0"
+__maintainer__ = "Rob van Putten"
+__email__ = "breinbaasnl@gmail.com"
+__status__ = "Development"
+
+import numpy as np
+from typing import List, Tuple, Iterator, Union
+
+from .pointrd import PointRD
+
+class ReferenceLine():
+    """Referentielijn stored as separate numpy arrays for the chainage, x, y, lat and lon
+
+    Indexing or iterating gives PointRD objects which are created on the fly, changing
+    these points will not change the referenceline. Pickling (for example to send it
+    to a worker process) only copies the arrays.
+    """
+    def __init__(self, chainage: np.array = [], x: np.array = [], y: np.array = [], lat: np.array = None, lon: np.array = None):
+        self.chainage = np.asarray(chainage, dtype=np.int64)
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.lat = np.full(len(self.chainage), np.nan) if lat is None else np.asarray(lat, dtype=float)
+        self.lon = np.full(len(self.chainage), np.nan) if lon is None else np.asarray(lon, dtype=float)
+
+        if not len(self.chainage) == len(self.x) == len(self.y) == len(self.lat) == len(self.lon):
+            raise ValueError("All arrays of the referenceline should have the same length")
+
+    @classmethod
+    def from_points(cls, points: List[PointRD]) -> "ReferenceLine":
+        """Create a referenceline from a list of PointRD objects (or dictionaries with the PointRD fields)
+
+        Args:
+            points (List[PointRD]): the points on the referenceline
+
+        Returns:
+            ReferenceLine: the referenceline
+        """
+        points = [p if isinstance(p, PointRD) else PointRD.parse_obj(p) for p in points]
+        return cls(
+            chainage = [p.chainage for p in points],
+            x = [p.x for p in points],
+            y = [p.y for p in points],
+            lat = [p.lat for p in points],
+            lon = [p.lon for p in points]
+        )
+
+    # pydantic support so the referenceline can be used as a field type
+    # and a list of points will still be accepted as input
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def validate(cls, value) -> "ReferenceLine":
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, (list, tuple)):
+            return cls.from_points(value)
+        raise TypeError(f"Can not convert {type(value)} to a ReferenceLine")
+
+    def __len__(self) -> int:
+        return len(self.chainage)
+
+    def __getitem__(self, i: int) -> PointRD:
+        return PointRD(
+            chainage = int(self.chainage[i]),
+            x = self.x[i],
+            y = self.y[i],
+            lat = self.lat[i],
+            lon = self.lon[i]
+        )
+
+    def __iter__(self) -> Iterator[PointRD]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ReferenceLine):
+            return False
+        return all([np.array_equal(a, b, equal_nan=True) for a, b in zip(self._arrays(), other._arrays())])
+
+    def __repr__(self) -> str:
+        return f"ReferenceLine(points={len(self)}, chainage=[{self.chainage_min},{self.chainage_max}])"
+
+    def _arrays(self) -> Tuple[np.array, ...]:
+        return self.chainage, self.x, self.y, self.lat, self.lon
+
+    def to_points(self) -> List[PointRD]:
+        return list(self)
+
+    @property
+    def chainage_min(self) -> int:
+        if len(self) > 0:
+            return int(self.chainage[0])
+        else:
+            return 0
+
+    @property
+    def chainage_max(self) -> int:
+        if len(self) > 0:
+            return int(self.chainage[-1])
+        else:
+            return 0
+
+    def segment_indices(self, chainages: Union[float, np.array]) -> np.array:
+        """Get the index of the start point of the (first) segment that contains the chainage
+
+        Args:
+            chainages (np.array): the chainages
+
+        Returns:
+            np.array: the indices of the start points of the segments
+        """
+        chainages = np.asarray(chainages, dtype=float)
+        if len(self) < 2 or np.any(chainages < self.chainage_min) or np.any(chainages > self.chainage_max):
+            raise ValueError(f"Invalid chainage(s) found, limits are [{self.chainage_min},{self.chainage_max}]")
+        return np.maximum(np.searchsorted(self.chainage, chainages, side="left"), 1) - 1
+
+    def interpolate(self, chainages: np.array) -> Tuple[np.array, np.array]:
+        """Get the RD coordinates of the given chainages using linear interpolation between the points
+
+        Args:
+            chainages (np.array): the chainages
+
+        Returns:
+            Tuple[np.array, np.array]: x and y coordinates
+        """
+        chainages = np.asarray(chainages, dtype=float)
+        i1 = self.segment_indices(chainages)
+        i2 = i1 + 1
+        lch = self.chainage
+        dl = chainages - lch[i1]
+        x = self.x[i1] + dl / (lch[i2] - lch[i1]) * (self.x[i2] - self.x[i1])
+        y = self.y[i1] + dl / (lch[i2] - lch[i1]) * (self.y[i2] - self.y[i1])
+        return x, y
+
+    def partial(self, chainage_start: float, chainage_end: float, step: float = 10.0) -> np.array:
+        """Get the part of the referenceline between the given chainages, the part is sampled
+        every step meters and also contains all points of the referenceline inside the interval
+
+        Args:
+            chainage_start (float): the start chainage
+            chainage_end (float): the end chainage
+            step (float): the distance between the samples, default 10.0
+
+        Returns:
+            np.array: (n,2) array with the x and y coordinates
+        """
+        if len(self) < 2 or chainage_start > chainage_end or chainage_start < self.chainage_min or chainage_end > self.chainage_max:
+            raise ValueError(f"Invalid interval [{chainage_start},{chainage_end}], limits are [{self.chainage_min},{self.chainage_max}]")
+
+        samples = np.linspace(chainage_start, chainage_end, int((chainage_end - chainage_start) / step) + 1)
+        ifirst = np.searchsorted(self.chainage, chainage_start, side="right")
+        ilast = np.searchsorted(self.chainage, chainage_end, side="left")
+        chainages = np.union1d(samples, self.chainage[ifirst:ilast])
+        return np.column_stack((np.interp(chainages, self.chainage, self.x), np.interp(chainages, self.chainage, self.y)))
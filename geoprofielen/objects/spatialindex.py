@@ -0,0 +1,104 @@
+__author__ = "Breinbaas | Rob van Putten"
+__copyright__ = "Copyright 2020"
+__credits__ = ["Rob van Putten"]
+__license__ = "GPL"
+__version__ = "0.1.0"
+__maintainer__ = "Rob van Putten"
+__email__ = "breinbaasnl@gmail.com"
+__status__ = "Development"
+
+import numpy as np
+from typing import Tuple
+
+class SpatialIndex():
+    """Uniform grid over RD x / y coordinates for fast radius bounded nearest point queries
+
+    The cellsize should be equal to (or larger than) the maximum search distance so
+    only the cell of the query point and the 8 surrounding cells have to be checked.
+    """
+    def __init__(self, x: np.array, y: np.array, cellsize: float):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.cellsize = cellsize
+
+        # group the point indices per cell, the indices stay sorted within a cell
+        ix = np.floor(self.x / cellsize).astype(np.int64)
+        iy = np.floor(self.y / cellsize).astype(np.int64)
+        order = np.lexsort((iy, ix))
+        self.cells = {}
+        if len(order) > 0:
+            keys = np.column_stack((ix[order], iy[order]))
+            starts = np.flatnonzero(np.concatenate(([True], np.any(keys[1:] != keys[:-1], axis=1))))
+            for start, end in zip(starts, np.append(starts[1:], len(order))):
+                self.cells[(int(keys[start,0]), int(keys[start,1]))] = np.sort(order[start:end])
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def candidates(self, px: float, py: float) -> np.array:
+        """Return the indices of all points in the cell of the given point and the surrounding cells
+
+        Args:
+            px (float): x coordinate
+            py (float): y coordinate
+
+        Returns:
+            np.array: sorted indices of the candidate points
+        """
+        return self._cell_candidates(int(np.floor(px / self.cellsize)), int(np.floor(py / self.cellsize)))
+
+    def _cell_candidates(self, ix: int, iy: int) -> np.array:
+        result = [self.cells[(i, j)] for i in range(ix - 1, ix + 2) for j in range(iy - 1, iy + 2) if (i, j) in self.cells]
+        if len(result) == 0:
+            return np.array([], dtype=np.int64)
+        return np.sort(np.concatenate(result))
+
+    def nearest(self, px: np.array, py: np.array, max_distance: float, mask: np.array = None) -> Tuple[np.array, np.array]:
+        """Find the nearest point within max_distance (exclusive) for all given points, if
+        multiple points have the same distance the one with the lowest index is returned
+
+        Args:
+            px (np.array): x coordinates of the query points
+            py (np.array): y coordinates of the query points
+            max_distance (float): the maximum distance, should not be larger than the cellsize
+            mask (np.array): optional boolean array, points with a False value are skipped, default None
+
+        Returns:
+            Tuple[np.array, np.array]: index of the nearest point (-1 if none found) and the distance per query point
+        """
+        if max_distance > self.cellsize:
+            raise ValueError(f"The maximum distance ({max_distance}) can not be larger than the cellsize ({self.cellsize}) of the spatial index")
+
+        px = np.atleast_1d(np.asarray(px, dtype=float))
+        py = np.atleast_1d(np.asarray(py, dtype=float))
+        indices = np.full(len(px), -1, dtype=np.int64)
+        distances = np.full(len(px), np.inf)
+        if len(px) == 0:
+            return indices, distances
+
+        # the cells of all query points in one go, query points in the same cell share the candidates
+        keys = np.column_stack((np.floor(px / self.cellsize), np.floor(py / self.cellsize))).astype(np.int64)
+        cellkeys, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind="stable")
+        starts = np.searchsorted(inverse[order], np.arange(len(cellkeys) + 1))
+
+        for k in range(len(cellkeys)):
+            candidates = self._cell_candidates(int(cellkeys[k,0]), int(cellkeys[k,1]))
+            if mask is not None:
+                candidates = candidates[mask[candidates]]
+            if len(candidates) == 0:
+                continue
+
+            # distances from all query points in this cell to all candidates
+            queries = order[starts[k]:starts[k+1]]
+            dx = self.x[candidates][np.newaxis,:] - px[queries][:,np.newaxis]
+            dy = self.y[candidates][np.newaxis,:] - py[queries][:,np.newaxis]
+            dl = np.sqrt(dx**2 + dy**2)
+            imin = np.argmin(dl, axis=1) # first minimum = lowest index because the candidates are sorted
+            dmin = dl[np.arange(len(queries)), imin]
+            found = dmin < max_distance
+            indices[queries[found]] = candidates[imin[found]]
+            distances[queries[found]] = dmin[found]
+
+        return indices, distances
@@ -3,10 +3,11 @@
 import os
 from tqdm import tqdm
 import shapefile
-from pathlib import Path
 
 from geoprofielen.objects.geoprofilecreator import GeoProfileCreator
-from geoprofielen.objects.dbconnector import DBConnector
+from geoprofielen.objects.damwriter import DAMWriter
+from geoprofielen.objects.dijktrajectsnapshot import get_dijktrajecten
+from geoprofielen.objects.dijktrajectselection import DijkTrajectSelection
 from geoprofielen.settings import ROOT_DIR
 
 PILOT_AREA = [
@@ -27,68 +28,47 @@ PILOT_AREA = [
 SOILINVESTIGATION_POLYGON_FILE = "C:/Users/brein/Programming/Python/HDSR/geoprofielen/data/gis/soilinvestigation_area_polygons.shp"
 
 if __name__ == "__main__":
-    dbc = DBConnector()
-
     # maak een selectie op basis van de pilot area
-    dijktrajecten = {k:v for k,v in dbc.get_dijktrajecten().items() if v.id in PILOT_AREA}
+    # (gebruikt de lokale kopie indien beschikbaar, zie DIJKTRAJECTEN_SNAPSHOT_FILE in settings.py)
+    dijktrajecten = get_dijktrajecten(selection=DijkTrajectSelection(ids=PILOT_AREA))
     
     geoprofilecreator = GeoProfileCreator(
         cpt_path = os.path.join(ROOT_DIR, "data/sonderingen"),
-        borehole_path = os.path.join(ROOT_DIR, "data/boringen")
+        borehole_path = os.path.join(ROOT_DIR, "data/boringen"),
+        num_workers = 0 # use all cpus
     )
     
-    # todo > create LocationSegments.shp
-    segmentid = 0 # we need ids that are unique over all dijktrajecten so we can create one big shapefile
-    shapeinput = [] # this is where we store all info for the shape
-
-    p = Path(ROOT_DIR) / "data/dam/pilot"
-    p.mkdir(parents=True, exist_ok=True)
-    
-    fsegments = open(p / "segments.csv", 'w')
-    fsoilprofiles = open(p / "soilprofiles.csv", 'w')
-    fsegments.write("segment_id,soilprofile_id,probability,calculation_type\n")
-    fsoilprofiles.write("soilprofile_id,top_level,soil_name\n")
-
     # also read the polygons for the search for soilinvestigations
     sfrecords = []
     if os.path.isfile(SOILINVESTIGATION_POLYGON_FILE):
         sf = shapefile.Reader(SOILINVESTIGATION_POLYGON_FILE)
         sfrecords = sf.shapeRecords()
 
-    for dtcode, dijktraject in tqdm(dijktrajecten.items()):
+    for dtcode, dijktraject in dijktrajecten.items():
         # check if a polygon can be assigned
         for i in range(len(sfrecords)):
             if dijktraject.naam == sfrecords[i].record['naam']:
                 dijktraject.soilinvestigation_polygon = sfrecords[i].shape.points
                 break
-        
-        geoprofilecreator.dijktraject = dijktraject
-        try:
-            geoprofile = geoprofilecreator.execute(plot_map_path=os.path.join(ROOT_DIR, "data/geoprofiel/pilot"))
-            if len(geoprofile.soilprofiles) == 0: continue
-            
-            geoprofile.plot(os.path.join(ROOT_DIR, f"data/geoprofiel/pilot/{dtcode}.png"))
-            
-            # yes.. ugly.. I know :-/
-            lines_segments, lines_soilprofiles, segmentid, shapeinput = geoprofile.to_dam_input(segmentid, shapeinput)   
 
-            for line in lines_segments:
-                fsegments.write(line)   
-            for line in lines_soilprofiles:
-                fsoilprofiles.write(line)
-            
-        except Exception as e:
-            print(f"Got error trying to generate geoprofile for dijktraject {dtcode}; {e}")
-
-    fsegments.close()
-    fsoilprofiles.close()
-
-    w = shapefile.Writer(os.path.join(ROOT_DIR, "data/dam/pilot/LocationSegments.shp"))
-    w.field('segment_id', 'C')
+    # the geoprofiles are created (and plotted) in parallel but returned in order
+    # so the segmentids are the same as when the dijktrajecten are handled one by one
+    results = geoprofilecreator.execute_all(
+        dijktrajecten, 
+        plot_path=os.path.join(ROOT_DIR, "data/geoprofiel/pilot"), 
+        plot_map_path=os.path.join(ROOT_DIR, "data/geoprofiel/pilot")
+    )
+    # writes segments.csv, soilprofiles.csv and LocationSegments.shp, the segment ids
+    # are unique over all dijktrajecten so we can create one big shapefile
+    with DAMWriter(os.path.join(ROOT_DIR, "data/dam/pilot")) as damwriter:
+        for dtcode, geoprofile, error in tqdm(results, total=len(dijktrajecten)):
+            if geoprofile is None:
+                print(f"Got error trying to generate geoprofile for dijktraject {dtcode}; {error}")
+                continue
 
-    for segment_id, xypoints in shapeinput:
-        w.record(segment_id)
-        w.line([xypoints])
+            try:
+                if len(geoprofile.soilprofiles) == 0: continue
+                damwriter.write(geoprofile)
 
-    w.close()
-    
+            except Exception as e:
+                print(f"Got error trying to generate geoprofile for dijktraject {dtcode}; {e}")
@@ -1,7 +1,9 @@
 # achterhalen van alle gebruikte grondsoortnamen in de boringen
 from pathlib import Path
+import matplotlib
+matplotlib.use("Agg") # alleen plotten naar bestanden
 from geoprofielen.helpers import case_insensitive_glob
-from geoprofielen.objects.cpt import CPT, ConversionType
+from geoprofielen.objects.gefplotter import plot_gef_files
 from tqdm import tqdm
 
 
@@ -9,18 +11,12 @@ if __name__ == "__main__":
     f = open("./data/sonderingen/cptcoords.csv", 'w')
     sfiles = case_insensitive_glob("./data/sonderingen", ".gef")
 
-    for sfile in tqdm(sfiles):
-        cpt = CPT()        
-        try:
-            cpt.read(str(sfile))
-            cpt.convert()
-            cpt.plot(filepath="./data/sonderingen", filename=f"{sfile.stem}.png")
-            #cpt.convert(conversion_type=ConversionType.NEN_5104)
-            #cpt.plot(filepath="./data/sonderingen", filename=f"{sfile.stem}_nen.png")
-            f.write(f"{cpt.x},{cpt.y},{Path(cpt.filename).stem}\n")
-
-        except Exception as e:
-            print(f"Error reading {sfile} with error {e}.")
+    # inlezen, converteren en plotten gebeurt parallel, de resultaten komen in volgorde terug
+    for sfile, x, y, read_error, error in tqdm(plot_gef_files(sfiles, "CPT", "./data/sonderingen"), total=len(sfiles)):
+        if read_error != "" or error != "":
+            print(f"Error reading {sfile} with error {read_error}{error}.")
+        else:
+            f.write(f"{x},{y},{Path(sfile).stem}\n")
 
     f.close()
 
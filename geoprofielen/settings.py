@@ -1,5 +1,11 @@
 ROOT_DIR = "/home/breinbaas/Programming/Python/HDSR/geoprofielen/" # verwijzing naar data locatie
 SOILINVESTIGATION_POLYGON_FILE = "" # verwijzing naar polygonen bestand met beperkte gebieden om in te zoeken
+GEF_CACHE_PATH = "" # verwijzing naar de map voor de cache van ingelezen gef bestanden, leeg = geen cache
+DB_BATCH_SIZE = 500 # aantal records dat per keer uit de database wordt opgehaald
+DB_MAX_CONNECTIONS = 4 # maximaal aantal open verbindingen per proces met de database
+DIJKTRAJECTEN_TABLE = "rwk_areaal_2024" # tabel in de database met de dijktrajecten
+DIJKTRAJECTEN_SNAPSHOT_FILE = "" # verwijzing naar het bestand (.npz) met een lokale kopie van de dijktrajecten, leeg = altijd de database gebruiken
+DIJKTRAJECTEN_SNAPSHOT_MAX_AGE = 7 # aantal dagen dat de lokale kopie van de dijktrajecten geldig is, 0 = altijd geldig
 
 DEFAULT_MINIMUM_LAYERHEIGHT = 0.2 # minimale laaghoogte bij grondsoort conversies (bvt cpt -> grondsoorten)
 DEFAULT_CHAINAGE_STEP = 10 # stapgrootte tussen punten op de referentielijn om te zoeken naar grondonderzoek
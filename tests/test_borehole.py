@@ -20,3 +20,26 @@ def test_convert():
     borehole.convert()
     assert(len(borehole.soillayers)==2)
 
+
+def test_read_header_only():
+    borehole = Borehole.from_file("./tests/testdata/in/borehole.gef", header_only=True, count_rows=True)
+
+    assert(borehole.x == 123419)
+    assert(borehole.z_top == -0.48)
+    assert(len(borehole.soillayers)==0)
+    assert(borehole.num_datarows==7)
+    assert(borehole.data_offset > 0)
+
+def test_hdsrcode():
+    borehole = Borehole()
+    # the order of BOREHOLE_CODES decides, not the position in the soilcode
+    assert borehole._hdsrcode("Zs1_Ks1") == "klei_siltig"
+    assert borehole._hdsrcode("Vz1_Kz1") == "klei_zandig"
+    assert borehole._hdsrcode("Lz1") == "zand"
+    assert borehole._hdsrcode("unknown") is None
+
+def test_plot(tmp_path):
+    borehole = Borehole.from_file("./tests/testdata/in/borehole.gef")
+    borehole.convert()
+    borehole.plot(filepath=str(tmp_path), filename="borehole.png")
+    assert (tmp_path / "borehole.png").is_file()
@@ -0,0 +1,27 @@
+import numpy as np
+
+from geoprofielen.objects.coordconvertor import RDWGS84Converter
+
+def test_from_rd_array():
+    converter = RDWGS84Converter()
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, 280000, 1000)
+    y = rng.uniform(300000, 620000, 1000)
+
+    lat, lon = converter.from_rd_array(x, y)
+    for i in range(len(x)):
+        assert (lat[i], lon[i]) == converter.from_rd(x[i], y[i])
+
+    # the origin of the RD system
+    lat, lon = converter.from_rd_array([155000], [463000])
+    assert (lat[0], lon[0]) == (converter.phi0, converter.lam0)
+
+def test_from_wgs84_array():
+    converter = RDWGS84Converter()
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(50.7, 53.6, 1000)
+    lon = rng.uniform(3.3, 7.3, 1000)
+
+    x, y = converter.from_wgs84_array(lat, lon)
+    for i in range(len(lat)):
+        assert (x[i], y[i]) == converter.from_wgs84(lat[i], lon[i])
@@ -1,6 +1,8 @@
 import pytest
+import numpy as np
 
-from geoprofielen.objects.cpt import CPT
+from geoprofielen.objects.cpt import CPT, ConversionType, _sbt_index, _sbtn_index, _sbt_soilcodes, _sbtn_soilcodes, SBTN_TOLERANCE
+from geoprofielen.settings import HDSR_SOIL_COLORS
 
 def test_read():
     cpt = CPT()
@@ -33,3 +35,159 @@ def test_pre_excavated_depth():
     cpt = CPT()
     cpt.read("./tests/testdata/in/cpt_preexcavated_depth.gef")
     assert cpt.pre_excavated_depth == 2.0
+
+def test_read_data_block():
+    lines = [
+        "#COLUMNINFO= 1, m, penetration length, 1",
+        "#COLUMNINFO= 2, MPa, qc, 2",
+        "#COLUMNINFO= 3, MPa, fs, 3",
+        "#COLUMNVOID= 2, -9999.000000",
+        "#COLUMNSEPARATOR= ;",
+        "#RECORDSEPARATOR= !",
+        "#ZID= 31000, 1.0, 0.01",
+        "#EOH=",
+        "0.00;0.0000;0.0100;!",
+        "0.50;-9999.0;0.0200;!",
+        "",
+        "1.00;2.0000;0.0400;!",
+    ]
+    cpt = CPT()
+    cpt.read_from_gef_stringlist(lines)
+
+    assert cpt.z == [1.0, 0.0]
+    assert cpt.qc == [1e-3, 2.0]
+    assert cpt.u == [0.0, 0.0]
+    assert cpt.Rf[1] == 2.0
+
+def test_read_data_block_uneven_rows():
+    lines = [
+        "#COLUMNINFO= 1, m, penetration length, 1",
+        "#COLUMNINFO= 2, MPa, qc, 2",
+        "#COLUMNINFO= 3, MPa, fs, 3",
+        "#COLUMNSEPARATOR= ;",
+        "#RECORDSEPARATOR= !",
+        "#EOH=",
+        "0.00;1.0;0.0100;!",
+        "0.50;2.0;!",
+        "1.00;3.0;0.0300;0.0400;!",
+    ]
+    # 9 values would fit 3 rows of 3 columns but the rows are not valid
+    with pytest.raises(ValueError):
+        CPT().read_from_gef_stringlist(lines)
+
+def test_as_numpy():
+    cpt = CPT()
+    cpt.read("./tests/testdata/in/cpt.gef")
+
+    a = cpt.as_numpy()
+    assert a.shape == (610, 5)
+    assert np.shares_memory(a, cpt.data)
+    assert np.shares_memory(cpt.as_dataframe().to_numpy(), a)
+
+def test_list_columns():
+    # the measurements can still be used as lists
+    cpt = CPT(z=[0.0, -1.0], qc=[1.0, 2.0], fs=[0.01, 0.02])
+    assert cpt.z == [0.0, -1.0]
+    assert cpt.qc == [1.0, 2.0]
+    assert cpt.as_numpy().shape == (2, 5)
+
+    cpt.qc = [3.0, 4.0]
+    assert cpt.qc == [3.0, 4.0]
+    assert cpt.as_numpy()[:,1].tolist() == [3.0, 4.0]
+
+    # the returned lists are copies
+    cpt.z.append(-2.0)
+    assert len(cpt.z) == 2
+
+    with pytest.raises(ValueError):
+        cpt.fs = [0.1]
+
+def test_read_header_only():
+    cpt = CPT.from_file("./tests/testdata/in/cpt.gef", header_only=True, count_rows=True)
+
+    assert(cpt.name == "DKM-227")
+    assert(cpt.x == 139081.7)
+    assert(cpt.z_top == 0.73)
+    assert(cpt.date == "20030929")
+    assert(len(cpt.z) == 0)
+    assert(cpt.num_datarows == 610)
+
+    data = open("./tests/testdata/in/cpt.gef", "rb").read()
+    assert data[cpt.data_offset:].startswith(b"2.0000e-002 4.5000e-001")
+
+def test_average():
+    cpt = CPT()
+    cpt.read("./tests/testdata/in/cpt.gef")
+
+    a = cpt.as_numpy()
+    result = cpt.average([0.0, -5.0, 10.0], [-1.0, -7.5, 9.0])
+    assert result.shape == (3, 6)
+    selection = a[(a[:,0] <= -5.0) & (a[:,0] >= -7.5)]
+    assert np.allclose(result[1,2:], np.mean(selection[:,1:], axis=0))
+    # no data above the cpt
+    assert np.isnan(result[2,2:]).all()
+
+def test_convert_nen_5104():
+    cpt = CPT()
+    cpt.read("./tests/testdata/in/cpt.gef")
+    cpt.convert(conversion_type=ConversionType.NEN_5104)
+
+    assert len(cpt.soillayers) > 0
+    assert cpt.soillayers[0].z_top == round(cpt.z[0], 2)
+    # consecutive layers are merged and connected
+    for sl1, sl2 in zip(cpt.soillayers[:-1], cpt.soillayers[1:]):
+        assert sl1.soilcode != sl2.soilcode
+        assert sl1.z_bottom == sl2.z_top
+
+def test_convert_batch():
+    filenames = ["./tests/testdata/in/cpt.gef", "./tests/testdata/in/cpt_preexcavated_depth.gef"]
+    for conversion_type in ConversionType:
+        cpts = [CPT.from_file(f) for f in filenames]
+        for cpt in cpts:
+            cpt.convert(conversion_type=conversion_type, minimum_layer_height=0.1)
+        expected = [cpt.soillayers for cpt in cpts]
+
+        result = CPT.convert_batch(cpts, conversion_type=conversion_type, minimum_layer_height=0.1)
+        assert result == expected
+        assert [cpt.soillayers for cpt in cpts] == expected
+
+def test_convert_sbt():
+    for conversion_type in [ConversionType.SBT_DUTCH_NON_NORMALIZED, ConversionType.SBT_DUTCH_NORMALIZED]:
+        cpt = CPT()
+        cpt.read("./tests/testdata/in/cpt_preexcavated_depth.gef")
+        cpt.convert(conversion_type=conversion_type)
+
+        assert len(cpt.soillayers) > 0
+        assert all([sl.soilcode in HDSR_SOIL_COLORS.keys() for sl in cpt.soillayers])
+        # the pre excavated part is skipped
+        assert cpt.soillayers[0].z_top == round(cpt.z_top - cpt.pre_excavated_depth, 2)
+
+def test_sbt_index():
+    # ztop, zbot, qc [MPa], fs [MPa], Rf [%], u [MPa]
+    cptdata = np.array([[0.0, -0.2, 2.0, 0.02, 1.0, 0.1]])
+    stresses = np.array([[0.02, 0.01]])
+    # reference value; qt = 2.0 + 0.1 * (1 - 0.8) = 2.02, Isbt = sqrt((3.47 - log10(20.2))^2 + (log10(1.0) + 1.22)^2)
+    assert _sbt_index(cptdata)[0] == pytest.approx(2.48477, abs=1e-4)
+    assert _sbt_soilcodes(cptdata, stresses).tolist() == ["zand"]
+    # rows without stresses (pre excavated) are skipped
+    assert _sbt_soilcodes(cptdata, np.full((1, 2), np.nan)).tolist() == [""]
+
+def test_sbtn_index():
+    # clay-like, sand-like and peat-like rows, u = 0
+    cptdata = np.array([
+        [0.0, -0.2, 1.0, 0.03, 3.0, 0.0],
+        [-0.2, -0.4, 10.0, 0.05, 0.5, 0.0],
+        [-0.4, -0.6, 0.3, 0.015, 5.0, 0.0],
+    ])
+    stresses = np.array([[0.1, 0.05], [0.1, 0.05], [0.08, 0.03]])
+    Ic, n = _sbtn_index(cptdata, stresses)
+
+    # reference values from solving n = min(0.381 * Ic(n) + 0.05 * sigma_v0_eff / pa - 0.15, 1.0) by bisection
+    assert Ic == pytest.approx([2.82940, 1.61631, 3.31693], abs=0.01)
+    assert n == pytest.approx([0.95300, 0.49081, 1.0], abs=0.01)
+    assert _sbtn_soilcodes(cptdata, stresses).tolist() == ["klei_zandig", "zand", "klei_siltig"]
+
+    # the iteration converged; n is in range and does not change anymore
+    assert np.all((n > 0.0) & (n <= 1.0))
+    n_next = np.minimum(0.381 * Ic + 0.05 * stresses[:,1] / 0.1 - 0.15, 1.0)
+    assert np.all(np.abs(n_next - n) < SBTN_TOLERANCE)
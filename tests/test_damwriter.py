@@ -0,0 +1,57 @@
+import shapefile
+
+from geoprofielen.objects.pointrd import PointRD
+from geoprofielen.objects.geoprofile import Geoprofile
+from geoprofielen.objects.soilprofile import Soilprofile
+from geoprofielen.objects.soillayer import SoilLayer
+from geoprofielen.objects.damwriter import DAMWriter
+
+def _geoprofile(id: str, num_soilprofiles: int) -> Geoprofile:
+    return Geoprofile(
+        id = id,
+        points = [PointRD(chainage=0, x=139000.0, y=446330.0), PointRD(chainage=500, x=139500.0, y=446330.0)],
+        soilprofiles = [
+            Soilprofile(x_left=i*100, x_right=(i+1)*100, soillayers=[
+                SoilLayer(z_top=0.0, z_bottom=-1.5, soilcode="klei_siltig"),
+                SoilLayer(z_top=-1.5, z_bottom=-10.0, soilcode="zand")
+            ]) for i in range(num_soilprofiles)
+        ]
+    )
+
+def _read(path):
+    segments = open(path / "segments.csv").readlines()
+    soilprofiles = open(path / "soilprofiles.csv").readlines()
+    with shapefile.Reader(str(path / "LocationSegments.shp")) as sf:
+        shapes = [(sr.record['segment_id'], sr.shape.points) for sr in sf.iterShapeRecords()]
+    return segments, soilprofiles, shapes
+
+def test_write(tmp_path):
+    with DAMWriter(str(tmp_path)) as writer:
+        writer.write(_geoprofile("a", 2))
+        writer.write(_geoprofile("b", 1))
+    assert writer.segmentid == 3
+
+    segments, soilprofiles, shapes = _read(tmp_path)
+    assert segments[0] == "segment_id,soilprofile_id,probability,calculation_type\n"
+    assert segments[1:3] == ["1,profiel_1,100,Stability\n", "1,profiel_1,100,Piping\n"]
+    assert len(segments) == 7
+    assert soilprofiles[0] == "soilprofile_id,top_level,soil_name\n"
+    assert soilprofiles[-2:] == ["profiel_3,0.00,klei_siltig\n", "profiel_3,-1.50,zand\n"]
+    assert [s[0] for s in shapes] == ["1", "2", "3"]
+    assert len(shapes[0][1]) == 11 # every 10m
+
+def test_merge(tmp_path):
+    geoprofiles = [_geoprofile("a", 2), _geoprofile("b", 1), _geoprofile("c", 3)]
+    with DAMWriter(str(tmp_path / "serial")) as writer:
+        for geoprofile in geoprofiles:
+            writer.write(geoprofile)
+
+    # two parts, like two worker processes
+    with DAMWriter(str(tmp_path / "part1")) as writer:
+        writer.write(geoprofiles[0])
+    with DAMWriter(str(tmp_path / "part2")) as writer:
+        writer.write(geoprofiles[1])
+        writer.write(geoprofiles[2])
+    DAMWriter.merge(str(tmp_path / "merged"), [str(tmp_path / "part1"), str(tmp_path / "part2")])
+
+    assert _read(tmp_path / "merged") == _read(tmp_path / "serial")
@@ -1,8 +1,87 @@
-from geoprofielen.objects.dbconnector import DBConnector
+import os
+import math
+import pytest
+import numpy as np
+from shapely import wkb
+from shapely.geometry import LineString, MultiLineString
+
+from geoprofielen.objects.pointrd import PointRD
+from geoprofielen.objects.dbconnector import DBConnector, _dijktraject_from_row
+from geoprofielen.objects.dijktrajectselection import DijkTrajectSelection
 
 # note that the test result will depend on the database
 # if the entry changes it will result in an error eventhough
 # the code might be ok.. 
 def test_dijktrajecten():
     dbc = DBConnector()
-    dbc.get_dijktrajecten()
\ No newline at end of file
+    dbc.get_dijktrajecten()
+
+def test_dijktraject_from_row():
+    geom = MultiLineString([[(5.0, 52.0), (5.001, 52.0)], [(5.001, 52.0), (5.001, 52.001)]])
+    dt = _dijktraject_from_row(wkb.dumps(geom), "1", "test")
+    assert dt.id == "1"
+    assert dt.naam == "test"
+    # the duplicate point is removed
+    assert len(dt.referentielijn) == 3
+    assert list(dt.referentielijn.chainage) == [0, 68, 179]
+    assert dt.referentielijn.lon[-1] == 5.001
+
+    dt = _dijktraject_from_row(wkb.dumps(LineString([(5.0, 52.0), (5.001, 52.0)])), "2", "test")
+    assert len(dt.referentielijn) == 2
+
+    # NULL or empty geometries give an empty referentielijn
+    for geom in [None, wkb.dumps(LineString())]:
+        dt = _dijktraject_from_row(geom, "3", "test")
+        assert dt.id == "3"
+        assert len(dt.referentielijn) == 0
+
+def test_dijktraject_from_row_chainage():
+    # the chainages should be the same as converting and measuring point by point
+    rng = np.random.default_rng(0)
+    lon = 5.0 + np.cumsum(rng.uniform(0, 2e-4, 2000))
+    lat = 52.0 + np.cumsum(rng.uniform(-2e-4, 2e-4, 2000))
+    dt = _dijktraject_from_row(wkb.dumps(LineString(zip(lon, lat))), "1", "test")
+
+    pts = [PointRD(lon=p[0], lat=p[1]) for p in zip(lon, lat)]
+    chainage, chainages = 0, []
+    for i, p in enumerate(pts):
+        p.to_rd()
+        if i > 0:
+            chainage += math.sqrt((p.x - pts[i-1].x)**2 + (p.y - pts[i-1].y)**2)
+        if not int(chainage) in chainages:
+            chainages.append(int(chainage))
+
+    assert dt.referentielijn.chainage.astype(np.int64).tolist() == chainages
+
+# to test against a local (PostGIS) database set the environment variable 
+# GEOPROFIELEN_TEST_DSN to the connection string, like "host=localhost dbname=test user=postgres"
+@pytest.mark.skipif(os.environ.get("GEOPROFIELEN_TEST_DSN") is None, reason="no local test database")
+def test_dijktrajecten_local():
+    dbc = DBConnector(dsn=os.environ["GEOPROFIELEN_TEST_DSN"])
+    with dbc.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("drop table if exists test_dijktrajecten")
+            cur.execute("create table test_dijktrajecten (geom geometry, subsect_id text, naam text)")
+            for i in range(25):
+                cur.execute(
+                    "insert into test_dijktrajecten values (ST_GeomFromText(%s, 4326), %s, %s)", 
+                    (f"MULTILINESTRING Z((5.0 52.0 0, 5.001 {52.0 + i * 0.001} 0))", str(i), f"traject {i}")
+                )
+    try:
+        # small batches to force multiple roundtrips
+        assert len(list(dbc._stream("select subsect_id from test_dijktrajecten", batch_size=10))) == 25
+        dijktrajecten = dbc.get_dijktrajecten(table="test_dijktrajecten")
+        assert len(dijktrajecten) == 25
+        assert dijktrajecten["3"].naam == "traject 3"
+        assert len(dijktrajecten["3"].referentielijn) == 2
+        # only the selected dijktrajecten
+        selection = DijkTrajectSelection(ids=["3", "4", "5"], name_patterns=["%3", "%4"])
+        assert sorted(dbc.get_dijktrajecten(table="test_dijktrajecten", selection=selection).keys()) == ["3", "4"]
+        # the 25 lines start at the same point, so select on the end points
+        p = dijktrajecten["10"].referentielijn[-1]
+        selection = DijkTrajectSelection(bbox=[p.x - 1, p.y - 1, p.x + 1, p.y + 1])
+        assert list(dbc.get_dijktrajecten(table="test_dijktrajecten", selection=selection).keys()) == ["10"]
+    finally:
+        with dbc.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("drop table test_dijktrajecten")
@@ -2,6 +2,7 @@ import pytest
 from shapely.geometry import Polygon, Point
 
 from geoprofielen.objects.dijktraject import DijkTraject
+from geoprofielen.objects.pointrd import PointRD
 
 def test_point_in_soilinvestigation_polygon():
     dt = DijkTraject()
@@ -16,4 +17,38 @@ def test_point_in_soilinvestigation_polygon_no_polygon():
     # alles moet goedgekeurd worden
     assert dt.point_in_soilinvestigation_polygon(x=0, y=0) == True
     assert dt.point_in_soilinvestigation_polygon(x=-2, y=0) == True
-    assert dt.point_in_soilinvestigation_polygon(x=1, y=1) == True
\ No newline at end of file
+    assert dt.point_in_soilinvestigation_polygon(x=1, y=1) == True
+
+
+def test_points_in_soilinvestigation_polygon():
+    dt = DijkTraject()
+    dt.soilinvestigation_polygon = [(-1,-1),(-1,1),(1,1),(1,-1)]
+    result = dt.points_in_soilinvestigation_polygon([0, -2, 1, 0.5], [0, 0, 1, -0.5])
+    assert list(result) == [True, False, False, True]
+
+    # assigning a new polygon resets the cached polygon
+    dt.soilinvestigation_polygon = [(1,1),(1,3),(3,3),(3,1)]
+    assert dt.point_in_soilinvestigation_polygon(x=0, y=0) == False
+    assert dt.point_in_soilinvestigation_polygon(x=2, y=2) == True
+
+    dt = DijkTraject()
+    assert list(dt.points_in_soilinvestigation_polygon([0, 100], [0, 100])) == [True, True]
+
+def test_chainages_to_xy():
+    dt = DijkTraject(referentielijn=[
+        PointRD(chainage=0, x=0.0, y=0.0), 
+        PointRD(chainage=10, x=10.0, y=0.0), 
+        PointRD(chainage=20, x=10.0, y=10.0)
+    ])
+    chainages = [0, 5, 10, 15, 20]
+    x, y = dt.chainages_to_xy(chainages)
+    assert list(x) == [0.0, 5.0, 10.0, 10.0, 10.0]
+    assert list(y) == [0.0, 0.0, 0.0, 5.0, 10.0]
+
+    x, y, lat, lon = dt.chainages_to_xy(chainages, wgs84=True)
+    for i, chainage in enumerate(chainages):
+        point = dt.chainage_to_xy(chainage)
+        assert (point.x, point.y, point.lat, point.lon) == (x[i], y[i], lat[i], lon[i])
+
+    with pytest.raises(ValueError):
+        dt.chainages_to_xy([-1, 5])
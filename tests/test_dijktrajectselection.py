@@ -0,0 +1,36 @@
+import pytest
+
+from geoprofielen.objects.pointrd import PointRD
+from geoprofielen.objects.dijktraject import DijkTraject
+from geoprofielen.objects.dijktrajectselection import DijkTrajectSelection
+
+DIJKTRAJECT = DijkTraject(id="118A1", naam="Lopikerwaard 1", referentielijn=[
+    PointRD(chainage=0, x=139000.0, y=446330.0),
+    PointRD(chainage=500, x=139500.0, y=446330.0)
+])
+
+def test_to_sql():
+    assert DijkTrajectSelection().to_sql() == ("", [])
+
+    where, params = DijkTrajectSelection(ids=["118A1", "118B1"], name_patterns=["lopik%"]).to_sql()
+    assert where == " where subsect_id = ANY(%s) and naam ILIKE ANY(%s)"
+    assert params == [["118A1", "118B1"], ["lopik%"]]
+
+    where, params = DijkTrajectSelection(bbox=[139000, 446000, 140000, 447000], polygon=[(0,0),(1,0),(1,1)]).to_sql()
+    assert where.count("ST_Intersects") == 2
+    assert params == [139000.0, 446000.0, 140000.0, 447000.0, "POLYGON ((0 0, 1 0, 1 1, 0 0))"]
+
+    with pytest.raises(ValueError):
+        DijkTrajectSelection(bbox=[0, 0, 1]).to_sql()
+
+def test_matches():
+    assert DijkTrajectSelection().matches(DIJKTRAJECT)
+    assert DijkTrajectSelection(ids=["118A1", "118B1"]).matches(DIJKTRAJECT)
+    assert not DijkTrajectSelection(ids=["118B1"]).matches(DIJKTRAJECT)
+    assert DijkTrajectSelection(name_patterns=["lopik%"]).matches(DIJKTRAJECT)
+    assert DijkTrajectSelection(name_patterns=["lopikerwaard _"]).matches(DIJKTRAJECT)
+    assert not DijkTrajectSelection(name_patterns=["lopik"]).matches(DIJKTRAJECT)
+    assert DijkTrajectSelection(bbox=[139200, 446000, 139300, 447000]).matches(DIJKTRAJECT)
+    assert not DijkTrajectSelection(bbox=[140000, 446000, 141000, 447000]).matches(DIJKTRAJECT)
+    assert DijkTrajectSelection(polygon=[(139400, 446000), (139600, 446000), (139600, 447000)]).matches(DIJKTRAJECT)
+    assert not DijkTrajectSelection(ids=["118A1"], polygon=[(0, 0), (1, 0), (1, 1)]).matches(DIJKTRAJECT)
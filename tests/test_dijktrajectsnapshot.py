@@ -0,0 +1,69 @@
+import json
+import numpy as np
+
+from geoprofielen.objects.pointrd import PointRD
+from geoprofielen.objects.dijktraject import DijkTraject
+from geoprofielen.objects.dijktrajectsnapshot import DijkTrajectSnapshot, get_dijktrajecten
+from geoprofielen.objects.dijktrajectselection import DijkTrajectSelection
+
+DIJKTRAJECTEN = {
+    "118A1": DijkTraject(id="118A1", naam="traject a", referentielijn=[
+        PointRD(chainage=0, x=139000.0, y=446330.0, lat=52.0, lon=5.0),
+        PointRD(chainage=500, x=139500.0, y=446330.0, lat=52.1, lon=5.1)
+    ]),
+    "118A2": DijkTraject(id="118A2", naam="traject b", referentielijn=[
+        PointRD(chainage=0, x=139500.0, y=446330.0),
+        PointRD(chainage=100, x=139600.0, y=446330.0),
+        PointRD(chainage=200, x=139700.0, y=446330.0)
+    ])
+}
+
+def test_save_load(tmp_path):
+    snapshot = DijkTrajectSnapshot(str(tmp_path / "dijktrajecten.npz"))
+    assert snapshot.load() is None
+
+    snapshot.save(DIJKTRAJECTEN)
+    dijktrajecten = snapshot.load()
+    assert list(dijktrajecten.keys()) == ["118A1", "118A2"]
+    for k, dt in DIJKTRAJECTEN.items():
+        assert dijktrajecten[k].naam == dt.naam
+        assert dijktrajecten[k].referentielijn == dt.referentielijn
+
+    # other table
+    assert snapshot.load(table="other_table") is None
+
+    # disabled
+    assert DijkTrajectSnapshot("").load() is None
+
+def test_freshness(tmp_path):
+    filename = tmp_path / "dijktrajecten.npz"
+    DijkTrajectSnapshot(str(filename)).save(DIJKTRAJECTEN)
+
+    # make the snapshot 2 days old
+    data = dict(np.load(filename))
+    key = json.loads(str(data["key"]))
+    key["created"] -= 2 * 24 * 3600
+    data["key"] = np.array(json.dumps(key))
+    np.savez(filename, **data)
+
+    assert DijkTrajectSnapshot(str(filename), max_age=1).load() is None
+    assert DijkTrajectSnapshot(str(filename), max_age=3).load() is not None
+    assert DijkTrajectSnapshot(str(filename), max_age=0).load() is not None
+
+def test_get_dijktrajecten(tmp_path):
+    # with a valid snapshot the database is not used
+    filename = str(tmp_path / "dijktrajecten.npz")
+    DijkTrajectSnapshot(filename).save(DIJKTRAJECTEN)
+    dijktrajecten = get_dijktrajecten(snapshot_file=filename)
+    assert dijktrajecten["118A2"].chainage_max == 200
+    dijktrajecten = get_dijktrajecten(snapshot_file=filename, selection=DijkTrajectSelection(ids=["118A2"]))
+    assert list(dijktrajecten.keys()) == ["118A2"]
+
+def test_testdata_snapshot():
+    # the snapshot used by the tests that would otherwise need the database, this has to be
+    # created again (with DijkTrajectSnapshot.save) if DIJKTRAJECT_SNAPSHOT_VERSION changes
+    dijktrajecten = DijkTrajectSnapshot("./tests/testdata/in/dijktrajecten.npz", max_age=0).load()
+    assert dijktrajecten is not None
+    assert "126" in dijktrajecten
+    # NULL geometries give an empty referentielijn
+    assert len(dijktrajecten["118B4"].referentielijn) == 0
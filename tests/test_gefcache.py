@@ -0,0 +1,67 @@
+import os
+import shutil
+
+import geoprofielen.objects.gefcache
+from geoprofielen.objects.gefcache import GEFCache, conversion_tag
+from geoprofielen.objects.cpt import CPT
+
+def test_load_save(tmp_path):
+    filename = str(tmp_path / "cpt.gef")
+    shutil.copy("./tests/testdata/in/cpt.gef", filename)
+    gefcache = GEFCache(cache_path=str(tmp_path / "cache"))
+
+    assert gefcache.load(filename, tag="CPT") is None
+
+    cpt = CPT.from_file(filename)
+    gefcache.save(filename, cpt, tag="CPT")
+    cached = gefcache.load(filename, tag="CPT")
+    assert cached.name == "DKM-227"
+    assert (cached.as_numpy() == cpt.as_numpy()).all()
+    assert gefcache.load(filename, tag="Borehole") is None
+
+    # changing the original file invalidates the cached object
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+    assert gefcache.load(filename, tag="CPT") is None
+
+def test_disabled(tmp_path):
+    gefcache = GEFCache(cache_path="")
+    gefcache.save("./tests/testdata/in/cpt.gef", CPT(), tag="CPT")
+    assert gefcache.load("./tests/testdata/in/cpt.gef", tag="CPT") is None
+
+def test_versions(tmp_path, monkeypatch):
+    filename = str(tmp_path / "cpt.gef")
+    shutil.copy("./tests/testdata/in/cpt.gef", filename)
+    gefcache = GEFCache(cache_path=str(tmp_path / "cache"))
+    cpt = CPT.from_file(filename)
+
+    # a new parser version invalidates all cached objects
+    gefcache.save(filename, cpt, tag="CPT")
+    assert gefcache.load(filename, tag="CPT") is not None
+    monkeypatch.setattr(geoprofielen.objects.gefcache, "GEF_PARSER_VERSION", geoprofielen.objects.gefcache.GEF_PARSER_VERSION + 1)
+    assert gefcache.load(filename, tag="CPT") is None
+
+    # a new conversion version invalidates the cached converted objects
+    gefcache.save(filename, cpt, tag=conversion_tag("CPT_NEN_5104"))
+    assert gefcache.load(filename, tag=conversion_tag("CPT_NEN_5104")) is not None
+    monkeypatch.setattr(geoprofielen.objects.gefcache, "GEF_CONVERSION_VERSION", geoprofielen.objects.gefcache.GEF_CONVERSION_VERSION + 1)
+    assert gefcache.load(filename, tag=conversion_tag("CPT_NEN_5104")) is None
+
+def test_conversion_settings(monkeypatch):
+    # the settings used by the conversion are part of the tag
+    tag = conversion_tag("Borehole_converted")
+    monkeypatch.setattr(geoprofielen.objects.gefcache, "BOREHOLE_CODES", {"zand": ["Z"]})
+    assert conversion_tag("Borehole_converted") != tag
+    monkeypatch.undo()
+    assert conversion_tag("Borehole_converted") == tag
+    monkeypatch.setattr(geoprofielen.objects.gefcache, "DEFAULT_MINIMUM_LAYERHEIGHT", 0.5)
+    assert conversion_tag("Borehole_converted") != tag
+
+def test_invalid_cachefile(tmp_path):
+    filename = "./tests/testdata/in/cpt.gef"
+    gefcache = GEFCache(cache_path=str(tmp_path))
+    gefcache.save(filename, CPT(), tag="CPT")
+
+    # a damaged cache file is a cache miss
+    gefcache._cachefile(filename, "CPT").write_bytes(b"not a pickle")
+    assert gefcache.load(filename, tag="CPT") is None
@@ -0,0 +1,32 @@
+import pytest
+
+from geoprofielen.objects.gefplotter import plot_gef_files
+
+FILES = [
+    "./tests/testdata/in/cpt.gef",
+    "./tests/testdata/in/cpt_preexcavated_depth.gef",
+    "./tests/testdata/in/does_not_exist.gef",
+]
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_plot_gef_files(tmp_path, num_workers):
+    results = list(plot_gef_files(FILES, "CPT", str(tmp_path), num_workers=num_workers))
+
+    # same order as the files
+    assert [r[0] for r in results] == FILES
+    assert results[0][3] == "" and results[0][4] == ""
+    assert results[0][1] > 0 and results[0][2] > 0
+    assert (tmp_path / "cpt.png").is_file()
+    assert (tmp_path / "cpt_preexcavated_depth.png").is_file()
+
+    # read errors do not stop the other files
+    assert results[2][3] != ""
+    assert not (tmp_path / "does_not_exist.png").is_file()
+
+def test_plot_gef_files_borehole(tmp_path):
+    results = list(plot_gef_files(["./tests/testdata/in/borehole.gef"], "Borehole", str(tmp_path)))
+    assert results[0][1] == 123419
+    assert (tmp_path / "borehole.png").is_file()
+
+    with pytest.raises(ValueError):
+        list(plot_gef_files([], "Unknown", str(tmp_path)))
@@ -1,32 +1,147 @@
 import os
+import shutil
 
 from geoprofielen.objects.geoprofilecreator import GeoProfileCreator
-from geoprofielen.objects.dbconnector import DBConnector
-from geoprofielen.settings import ROOT_DIR
+from geoprofielen.objects.dijktrajectsnapshot import get_dijktrajecten
+from geoprofielen.objects.dijktrajectselection import DijkTrajectSelection
+from geoprofielen.objects.dijktraject import DijkTraject
+from geoprofielen.objects.pointrd import PointRD
 
-def test_dijktrajecten():
-    dbc = DBConnector()
-    dijktrajecten = dbc.get_dijktrajecten()
+# local copy of test dijktrajecten so the tests do not need the database
+TEST_SNAPSHOT_FILE = "./tests/testdata/in/dijktrajecten.npz"
+
+def test_dijktrajecten(tmp_path):
+    dijktrajecten = get_dijktrajecten(snapshot_file=TEST_SNAPSHOT_FILE, max_age=0, selection=DijkTrajectSelection(ids=['126']))
 
     # test met 126
     dijktraject = dijktrajecten['126']
 
     geoprofilecreator = GeoProfileCreator(
-        cpt_path = os.path.join(ROOT_DIR, "data/sonderingen"),
-        borehole_path = os.path.join(ROOT_DIR, "data/boringen"),
+        cpt_path = "./tests/testdata/in",
+        borehole_path = "./tests/testdata/in",
         dijktraject = dijktraject
     )
 
     geoprofile = geoprofilecreator.execute()
-    geoprofile.plot("./tests/testdata/out/test_geoprofile.png")
-    geoprofilecreator.save_log(os.path.join(ROOT_DIR, "data/geoprofiel/creator.log")) 
+    assert len(geoprofile.soilprofiles) > 0
+    geoprofile.plot(str(tmp_path / "test_geoprofile.png"))
+    geoprofilecreator.save_log(str(tmp_path / "creator.log"))
+
+def test_read_parallel():
+    geoprofilecreator = GeoProfileCreator(
+        cpt_path = "./tests/testdata/in",
+        borehole_path = "./tests/testdata/in",
+    )
+
+    geoprofilecreator.refresh(full=True)
+    cpts = [(c.filename, c.soillayers) for c in geoprofilecreator._cpts]
+    boreholes = [(b.filename, b.soillayers) for b in geoprofilecreator._boreholes]
 
-    
+    geoprofilecreator.num_workers = 2
+    geoprofilecreator.refresh(full=True)
+    assert [(c.filename, c.soillayers) for c in geoprofilecreator._cpts] == cpts
+    assert [(b.filename, b.soillayers) for b in geoprofilecreator._boreholes] == boreholes
 
+def test_refresh(tmp_path):
+    shutil.copy("./tests/testdata/in/cpt.gef", tmp_path / "cpt1.gef")
+    geoprofilecreator = GeoProfileCreator(
+        cpt_path = str(tmp_path),
+        borehole_path = str(tmp_path),
+    )
+    geoprofilecreator.refresh(full=True)
+    assert len(geoprofilecreator._cpts) == 1
+    cpt1 = geoprofilecreator._cpts[0]
 
+    # only the new file is read
+    shutil.copy("./tests/testdata/in/cpt_preexcavated_depth.gef", tmp_path / "cpt2.gef")
+    geoprofilecreator.refresh()
+    assert len(geoprofilecreator._cpts) == 2
+    assert cpt1 in geoprofilecreator._cpts
 
+    # and removed files are dropped
+    os.remove(tmp_path / "cpt1.gef")
+    geoprofilecreator.refresh()
+    assert len(geoprofilecreator._cpts) == 1
+    assert geoprofilecreator._cpts[0].name != cpt1.name
 
+def test_execute():
+    dijktraject = DijkTraject(
+        id = "test",
+        naam = "test",
+        referentielijn = [PointRD(chainage=0, x=139000.0, y=446330.0), PointRD(chainage=500, x=139500.0, y=446330.0)]
+    )
+    geoprofilecreator = GeoProfileCreator(
+        cpt_path = "./tests/testdata/in",
+        borehole_path = "./tests/testdata/in",
+        dijktraject = dijktraject
+    )
+    geoprofilecreator.refresh(full=True)
+    geoprofile = geoprofilecreator.execute()
+
+    # the cpt is at x=139081.7 and is used up to a distance of MAX_CPT_DISTANCE
+    assert len(geoprofile.soilprofiles) == 1
+    assert geoprofile.soilprofiles[0].source == "cpt"
+    assert geoprofile.soilprofiles[0].x_left == 0
+    assert geoprofile.soilprofiles[0].x_right == 180
+
+def test_execute_soilinvestigation_polygon():
+    dijktraject = DijkTraject(
+        id = "test",
+        naam = "test",
+        referentielijn = [PointRD(chainage=0, x=139000.0, y=446330.0), PointRD(chainage=500, x=139500.0, y=446330.0)],
+        soilinvestigation_polygon = [(139000, 446330), (139000, 446340), (139500, 446340), (139500, 446330)] # cpt is outside
+    )
+    geoprofilecreator = GeoProfileCreator(
+        cpt_path = "./tests/testdata/in",
+        borehole_path = "./tests/testdata/in",
+        dijktraject = dijktraject
+    )
+    geoprofile = geoprofilecreator.execute()
+    assert len(geoprofile.soilprofiles) == 0
+
+def test_execute_all(tmp_path):
+    dijktrajecten = {
+        f"test{i}": DijkTraject(
+            id = f"test{i}",
+            naam = f"test{i}",
+            referentielijn = [PointRD(chainage=0, x=139000.0 + i * 20, y=446330.0), PointRD(chainage=500, x=139500.0 + i * 20, y=446330.0)]
+        ) for i in range(6)
+    }
+    dijktrajecten["empty"] = DijkTraject(id="empty", naam="empty") # gives an error
+
+    geoprofilecreator = GeoProfileCreator(
+        cpt_path = "./tests/testdata/in",
+        borehole_path = "./tests/testdata/in",
+    )
+    geoprofilecreator.refresh(full=True)
+    geoprofilecreator.dijktraject = dijktrajecten["test0"]
 
+    serial = list(geoprofilecreator.execute_all(dijktrajecten))
+    # the dijktraject of the creator is not changed by the serial run
+    assert geoprofilecreator.dijktraject is dijktrajecten["test0"]
+    geoprofilecreator.num_workers = 3
+    parallel = list(geoprofilecreator.execute_all(dijktrajecten, plot_path=str(tmp_path)))
 
+    assert [r[0] for r in parallel] == list(dijktrajecten.keys())
+    for (_, g1, e1), (_, g2, e2) in zip(serial, parallel):
+        assert e1 == e2
+        assert (g1 is None) == (g2 is None)
+        if g1 is not None:
+            assert g1.soilprofiles == g2.soilprofiles
+    assert parallel[-1][1] is None and parallel[-1][2] != ""
+    assert parallel[0][1].soilprofiles[0].x_right == 180
+    assert (tmp_path / "test0.png").is_file()
 
+def test_separate_instances(tmp_path):
+    shutil.copy("./tests/testdata/in/cpt.gef", tmp_path / "cpt1.gef")
+    creator1 = GeoProfileCreator(cpt_path = str(tmp_path), borehole_path = str(tmp_path))
+    creator2 = GeoProfileCreator(cpt_path = "./tests/testdata/in", borehole_path = "./tests/testdata/in")
+    creator1.refresh(full=True)
+    creator2.refresh(full=True)
 
+    # every creator has its own files, spatial indices and log
+    assert len(creator1._cpts) == 1
+    assert len(creator2._cpts) == 2
+    assert len(creator1._indexes["cpt"].x) == 1
+    assert len(creator2._indexes["cpt"].x) == 2
+    assert creator1.log is not creator2.log
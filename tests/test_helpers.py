@@ -0,0 +1,19 @@
+from shapely import wkb
+from shapely.geometry import LineString, MultiLineString
+
+from geoprofielen.helpers import wkb_to_linestrings
+
+def test_wkb_to_linestrings():
+    coords = [[5.0, 52.0], [5.1, 52.1], [5.2, 52.0]]
+    ls = LineString(coords)
+    assert [a.tolist() for a in wkb_to_linestrings(wkb.dumps(ls))] == [coords]
+    # big endian and EWKB with SRID
+    assert [a.tolist() for a in wkb_to_linestrings(wkb.dumps(ls, big_endian=True))] == [coords]
+    assert [a.tolist() for a in wkb_to_linestrings(wkb.dumps(ls, srid=4326))] == [coords]
+
+    # z values are ignored
+    mls = MultiLineString([[(0.0, 0.0, 1.0), (1.0, 2.0, 1.0)], [(3.0, 4.0, 1.0), (6.0, 7.0, 1.0)]])
+    result = wkb_to_linestrings(wkb.dumps(mls))
+    assert [a.tolist() for a in result] == [[[0.0, 0.0], [1.0, 2.0]], [[3.0, 4.0], [6.0, 7.0]]]
+
+    assert wkb_to_linestrings(None) == []
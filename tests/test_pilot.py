@@ -5,8 +5,13 @@ from pathlib import Path
 
 
 from geoprofielen.objects.geoprofilecreator import GeoProfileCreator
-from geoprofielen.objects.dbconnector import DBConnector
-from geoprofielen.settings import ROOT_DIR, SOILINVESTIGATION_POLYGON_FILE
+from geoprofielen.objects.damwriter import DAMWriter
+from geoprofielen.objects.dijktrajectsnapshot import get_dijktrajecten
+from geoprofielen.objects.dijktrajectselection import DijkTrajectSelection
+from geoprofielen.settings import SOILINVESTIGATION_POLYGON_FILE
+
+# local copy of test dijktrajecten so the tests do not need the database
+TEST_SNAPSHOT_FILE = "./tests/testdata/in/dijktrajecten.npz"
 
 DIJKTRAJECT_CODES = [
     '118A1', 
@@ -18,26 +23,16 @@ DIJKTRAJECT_CODES = [
     '118B4', 
 ]
 
-def test_main():
-    dbc = DBConnector()
-    dijktrajecten = dbc.get_dijktrajecten()
+def test_main(tmp_path):
+    dijktrajecten = get_dijktrajecten(snapshot_file=TEST_SNAPSHOT_FILE, max_age=0, selection=DijkTrajectSelection(ids=DIJKTRAJECT_CODES))
 
     geoprofilecreator = GeoProfileCreator(
-        cpt_path = os.path.join(ROOT_DIR, "data/sonderingen"),
-        borehole_path = os.path.join(ROOT_DIR, "data/boringen")
+        cpt_path = "./tests/testdata/in",
+        borehole_path = "./tests/testdata/in"
     )
     
-    # todo > create LocationSegments.shp
-    segmentid = 0 # we need ids that are unique over all dijktrajecten so we can create one big shapefile
-    shapeinput = [] # this is where we store all info for the shape
-
-    p = Path(ROOT_DIR) / "tests/pilot"
-    p.mkdir(parents=True, exist_ok=True)
-    
-    fsegments = open(p / "segments.csv", 'w')
-    fsoilprofiles = open(p / "soilprofiles.csv", 'w')
-    fsegments.write("segment_id,soilprofile_id,probability,calculation_type\n")
-    fsoilprofiles.write("soilprofile_id,top_level,soil_name\n")
+    p = tmp_path / "pilot"
+    damwriter = DAMWriter(str(p))
 
     # also read the polygons for the search for soilinvestigations
     sfrecords = []
@@ -62,25 +57,9 @@ def test_main():
             
             geoprofile.plot(str(p / f"{dtcode}.png"))
             
-            # yes.. ugly.. I know :-/
-            lines_segments, lines_soilprofiles, segmentid, shapeinput = geoprofile.to_dam_input(segmentid, shapeinput)   
-
-            for line in lines_segments:
-                fsegments.write(line)   
-            for line in lines_soilprofiles:
-                fsoilprofiles.write(line)
+            damwriter.write(geoprofile)
 
         except Exception as e:
             print(f"Got error trying to generate geoprofile for dijktraject {dtcode}; {e}")
 
-    fsegments.close()
-    fsoilprofiles.close()
-
-    w = shapefile.Writer(str(p / "LocationSegments.shp"))
-    w.field('segment_id', 'C')
-
-    for segment_id, xypoints in shapeinput:
-        w.record(segment_id)
-        w.line([xypoints])
-
-    w.close()
\ No newline at end of file
+    damwriter.close()
@@ -0,0 +1,8 @@
+from geoprofielen.objects.plotting import soillayer_collection
+
+def test_soillayer_collection():
+    collection = soillayer_collection(0.0, [10.0, 20.0], [1.0, 0.0], [0.0, -2.0], ["zand", "veen"])
+    paths = collection.get_paths()
+    assert len(paths) == 2
+    assert paths[1].vertices[:4].tolist() == [[0.0, -2.0], [20.0, -2.0], [20.0, 0.0], [0.0, 0.0]]
+    assert len(collection.get_facecolors()) == 2
@@ -0,0 +1,62 @@
+import pickle
+import numpy as np
+import pytest
+
+from geoprofielen.objects.pointrd import PointRD
+from geoprofielen.objects.referenceline import ReferenceLine
+from geoprofielen.objects.dijktraject import DijkTraject
+from geoprofielen.objects.geoprofile import Geoprofile
+
+POINTS = [
+    PointRD(chainage=0, x=0.0, y=0.0, lat=52.0, lon=5.0),
+    PointRD(chainage=10, x=10.0, y=0.0, lat=52.1, lon=5.1),
+    PointRD(chainage=20, x=10.0, y=10.0, lat=52.2, lon=5.2)
+]
+
+def test_from_points():
+    rl = ReferenceLine.from_points(POINTS)
+    assert len(rl) == 3
+    assert list(rl.chainage) == [0, 10, 20]
+    assert rl.chainage_min == 0
+    assert rl.chainage_max == 20
+    assert rl[1] == POINTS[1]
+    assert rl.to_points() == POINTS
+
+    with pytest.raises(ValueError):
+        ReferenceLine(chainage=[0, 10], x=[0.0], y=[0.0, 1.0])
+
+def test_interpolate():
+    rl = ReferenceLine.from_points(POINTS)
+    x, y = rl.interpolate([0, 5, 10, 15, 20])
+    assert list(x) == [0.0, 5.0, 10.0, 10.0, 10.0]
+    assert list(y) == [0.0, 0.0, 0.0, 5.0, 10.0]
+
+    with pytest.raises(ValueError):
+        rl.interpolate([21])
+
+def test_field():
+    # a list of points is converted to a referenceline
+    dt = DijkTraject(id="1", referentielijn=POINTS)
+    assert type(dt.referentielijn) == ReferenceLine
+    assert dt.chainage_max == 20
+
+    # and the object survives pickling (used for worker processes)
+    dt2 = pickle.loads(pickle.dumps(dt))
+    assert dt2.referentielijn == dt.referentielijn
+    assert np.isnan(DijkTraject().referentielijn.lat).all()
+
+    gp = Geoprofile(points=dt.referentielijn)
+    assert gp.points == dt.referentielijn
+
+def test_partial():
+    rl = ReferenceLine.from_points(POINTS)
+    # the corner at chainage 10 is included
+    assert rl.partial(5, 15).tolist() == [[5.0, 0.0], [10.0, 0.0], [10.0, 5.0]]
+    assert rl.partial(0, 20, step=5).tolist() == [[0.0, 0.0], [5.0, 0.0], [10.0, 0.0], [10.0, 5.0], [10.0, 10.0]]
+    assert rl.partial(12, 12).tolist() == [[10.0, 2.0]]
+
+    gp = Geoprofile(points=POINTS)
+    assert gp.get_partial_refline(5, 15) == [(5.0, 0.0), (10.0, 0.0), (10.0, 5.0)]
+
+    with pytest.raises(ValueError):
+        rl.partial(15, 25)
@@ -0,0 +1,38 @@
+import numpy as np
+
+from geoprofielen.objects.spatialindex import SpatialIndex
+
+def test_nearest():
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, 1000, 500).round(0) # rounding gives some equal distances
+    y = rng.uniform(0, 1000, 500).round(0)
+    px = rng.uniform(-100, 1100, 200)
+    py = rng.uniform(-100, 1100, 200)
+    mask = rng.uniform(size=500) > 0.3
+    
+    index = SpatialIndex(x, y, 100)
+    indices, distances = index.nearest(px, py, 100, mask=mask)
+
+    # compare with brute force, the first point wins if the distances are equal
+    for i in range(len(px)):
+        dl = np.sqrt((x - px[i])**2 + (y - py[i])**2)
+        dl[~mask] = np.inf
+        expected = np.argmin(dl) if dl.min() < 100 else -1
+        assert indices[i] == expected
+        if expected > -1:
+            assert distances[i] == dl[expected]
+
+def test_empty():
+    index = SpatialIndex([], [], 100)
+    indices, _ = index.nearest([0.0], [0.0], 100)
+    assert indices[0] == -1
+
+def test_nearest_same_cell():
+    # many query points in the same cells (like the points on a referentielijn)
+    x, y = np.array([10.0, 150.0, 160.0]), np.array([10.0, 50.0, 50.0])
+    px = np.arange(0.0, 300.0, 1.0)
+    index = SpatialIndex(x, y, 100)
+    indices, _ = index.nearest(px, np.full(len(px), 50.0), 100)
+    for i in range(len(px)):
+        dl = np.sqrt((x - px[i])**2 + (y - 50.0)**2)
+        assert indices[i] == (np.argmin(dl) if dl.min() < 100 else -1)